@@ -176,7 +176,7 @@ class DialogueManager:
             key_for_store: Optional[str] = None
             if nlu_res.slots.get("qtype") == "capital_of":
                 key = f"capital:{nlu_res.slots.get('country','')}"
-                found = ltm.get_facts(key)
+                found = ltm.get_facts(key, limit=1)
                 if found:
                     fact = found[0][2]
                     try:
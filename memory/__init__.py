@@ -1 +1,14 @@
-__all__ = ["store", "consolidator", "indexing"]
+__all__ = [
+    "store",
+    "consolidator",
+    "indexing",
+    "vectors",
+    "lsh",
+    "retention",
+    "cache",
+    "async_store",
+    "graph",
+    "pipeline",
+    "rules",
+    "binio",
+]
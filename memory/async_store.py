@@ -0,0 +1,116 @@
+"""asyncio facade over LTM.
+
+AsyncLTM runs a thread-safe LTM (see LTM(threadsafe=True)) on a small thread pool:
+each pool thread reads through its own SQLite connection and writes are queued to
+the LTM's single writer thread, so a slow query only occupies one worker instead of
+the event loop. Every public LTM method is available as a coroutine with the same
+arguments; iter_facts/iter_events/iter_facts_by_prefix are async generators.
+
+    async with AsyncLTM() as mem:
+        fid = await mem.add_fact("capital:france", "Paris")
+        async for event in mem.iter_events("chat"):
+            ...
+"""
+from __future__ import annotations
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional, Tuple
+
+from nova.config import Settings
+
+from .store import LTM
+
+# Sync-only parts of LTM: batch() holds a lock on the calling thread, close() has an async twin
+_SYNC_ONLY = {"batch", "close", "iter_facts", "iter_events", "iter_facts_by_prefix"}
+
+
+class AsyncLTM:
+    def __init__(
+        self,
+        ltm: Optional[LTM] = None,
+        *,
+        settings: Optional[Settings] = None,
+        max_workers: Optional[int] = None,
+    ) -> None:
+        self.ltm = ltm if ltm is not None else LTM(settings, threadsafe=True)
+        if self.ltm._writer is None:
+            raise ValueError("AsyncLTM needs a thread-safe LTM (LTM(threadsafe=True))")
+        workers = max_workers if max_workers is not None else self.ltm.settings.memory_async_workers
+        self._executor = ThreadPoolExecutor(max_workers=max(1, int(workers)), thread_name_prefix="nova-ltm")
+
+    def _run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Awaitable[Any]:
+        loop = asyncio.get_running_loop()
+        return loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+
+    def __getattr__(self, name: str) -> Callable[..., Awaitable[Any]]:
+        if name.startswith("_") or name in _SYNC_ONLY:
+            raise AttributeError(name)
+        attr = getattr(self.ltm, name)
+        if not callable(attr):
+            raise AttributeError(name)
+
+        @functools.wraps(attr)
+        async def call(*args: Any, **kwargs: Any) -> Any:
+            return await self._run(attr, *args, **kwargs)
+
+        return call
+
+    async def _stream(
+        self, page: Callable[..., list[Any]], key: Optional[str], batch_size: int, before_id: Optional[int], since: Any
+    ) -> AsyncIterator[Any]:
+        while True:
+            rows = await self._run(page, key, limit=batch_size, before_id=before_id, since=since)
+            for row in rows:
+                yield row
+            if len(rows) < batch_size:
+                return
+            before_id = int(rows[-1][0])
+
+    def iter_facts(
+        self,
+        key: Optional[str] = None,
+        *,
+        batch_size: int = 500,
+        before_id: Optional[int] = None,
+        since: Optional[datetime | str] = None,
+    ) -> AsyncIterator[tuple[int, str, str, Optional[int], str]]:
+        """Stream facts newest first; each page of batch_size rows is fetched on the pool."""
+        return self._stream(self.ltm.get_facts, key, batch_size, before_id, since)
+
+    def iter_events(
+        self,
+        type_: Optional[str] = None,
+        *,
+        batch_size: int = 500,
+        before_id: Optional[int] = None,
+        since: Optional[datetime | str] = None,
+    ) -> AsyncIterator[tuple[int, str, str, str]]:
+        """Stream events newest first; each page of batch_size rows is fetched on the pool."""
+        return self._stream(self.ltm.get_events, type_, batch_size, before_id, since)
+
+    async def iter_facts_by_prefix(
+        self, prefix: str, *, batch_size: int = 500
+    ) -> AsyncIterator[tuple[int, str, str, Optional[int], str]]:
+        """Stream facts whose key starts with prefix (see LTM.get_facts_by_prefix) page by page on the pool."""
+        after: Optional[Tuple[str, int]] = None
+        while True:
+            rows = await self._run(self.ltm.get_facts_by_prefix, prefix, batch_size, after)
+            for row in rows:
+                yield row
+            if len(rows) < batch_size:
+                return
+            after = (str(rows[-1][1]), int(rows[-1][0]))
+
+    async def close(self) -> None:
+        """Close the LTM (draining queued writes) and shut the pool down."""
+        await self._run(self.ltm.close)
+        self._executor.shutdown(wait=True)
+
+    async def __aenter__(self) -> "AsyncLTM":
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.close()
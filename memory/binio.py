@@ -0,0 +1,22 @@
+"""Little-endian array (de)serialization shared by the on-disk snapshots and vector blobs."""
+from __future__ import annotations
+
+import sys
+from array import array
+
+
+def le_bytes(arr: array) -> bytes:
+    """arr's items as little-endian bytes, whatever the host byte order."""
+    if sys.byteorder != "little":  # pragma: no cover - big-endian hosts
+        arr = array(arr.typecode, arr)
+        arr.byteswap()
+    return arr.tobytes()
+
+
+def from_le(typecode: str, data: bytes) -> array:
+    """Inverse of le_bytes: an array of typecode read from little-endian bytes."""
+    arr = array(typecode)
+    arr.frombytes(data)
+    if sys.byteorder != "little":  # pragma: no cover - big-endian hosts
+        arr.byteswap()
+    return arr
@@ -1,48 +1,62 @@
-"""Consolidation: create a simple daily summary entry in events."""
+"""Consolidation: create a simple daily summary entry in events.
+
+Each run embeds and extracts relations only from facts added since the previous run:
+the last processed fact id is kept in prefs (facts are never edited in place, so new
+ids are the only change). full=True, or a change of vector width, reprocesses everything.
+
+With memory_lsh_index on, the same pass signs facts into the MinHash LSH tables; turning
+it on (or changing bands/rows) rebuilds them with one full pass.
+"""
 from __future__ import annotations
 
 from datetime import datetime
 from typing import Optional
 
-from .store import LTM
-from .indexing import embed_text
+from .pipeline import run_pipeline
+from .store import LSH_PARAMS_PREF, LTM
 
 
 def summarize_session(ltm: LTM, *, max_items: int = 5) -> str:
-    facts = ltm.get_facts()
-    events = ltm.get_events()
+    stats = ltm.stats()
     parts: list[str] = []
-    if facts:
-        parts.append(f"facts={min(len(facts), max_items)}")
-    if events:
-        parts.append(f"events={min(len(events), max_items)}")
+    if stats["facts"]:
+        parts.append(f"facts={min(stats['facts'], max_items)}")
+    if stats["events"]:
+        parts.append(f"events={min(stats['events'], max_items)}")
     if not parts:
         parts.append("idle")
     return "; ".join(parts)
 
 
-def consolidate(ltm: Optional[LTM] = None) -> None:
+WATERMARK_PREF = "consolidation:last_fact_id"
+_DIM_PREF = "consolidation:vector_dim"
+
+
+def consolidate(ltm: Optional[LTM] = None, *, full: bool = False, workers: Optional[int] = None) -> int:
+    """Embed and extract relations from facts added since the last run; returns facts processed.
+
+    Large passes (e.g. full=True) fan out over `workers` processes (see memory.pipeline).
+    """
     store = ltm or LTM()
     summary = summarize_session(store)
     store.log_event("consolidation", f"{datetime.utcnow().isoformat()} | {summary}")
-    # Write/refresh vectors for facts
-    for fid, _k, val, _sid, _ts in store.get_facts():
-        try:
-            vec = embed_text(val)
-            store.upsert_fact_vector(int(fid), vec)
-        except Exception:
-            # Best-effort, continue
-            pass
-    # Extract simple relations from known fact patterns
-    try:
-        for _fid, key, value, sid, _ts in store.get_facts():
-            # Pattern: capital:<country> -> (country, capital_of, value)
-            if key.startswith("capital:"):
-                country = key.split(":", 1)[1].strip().title()
-                city = str(value).strip().title()
-                if country and city:
-                    store.add_relation(country, "capital_of", city, source_id=sid)
-                    store.add_relation(city, "is_capital_of", country, source_id=sid)
-            # You can extend with more patterns later
-    except Exception:
-        pass
+    dim = str(store.settings.memory_vector_dim)
+    minhash = store._minhasher if store.settings.memory_lsh_index else None
+    lsh_params = minhash.params if minhash is not None else ""
+    lsh_current = store.get_pref(LSH_PARAMS_PREF) == lsh_params
+    start = 0
+    if not full and store.get_pref(_DIM_PREF) == dim and (minhash is None or lsh_current):
+        start = int(store.get_pref(WATERMARK_PREF) or 0)
+    if minhash is not None and not lsh_current:
+        # Signatures from other bands/rows (or an index left stale while disabled) can't be mixed
+        store.reset_minhash()
+    # Facts added while this run is in progress are left for the next one
+    top = int(store._conn.execute("SELECT COALESCE(MAX(id), 0) FROM facts").fetchone()[0])
+    # Vectors, relations and (optionally) LSH signatures for new facts; committed page by page
+    processed = run_pipeline(store, start, top, workers=workers, minhash=minhash)
+    with store.batch():
+        store.set_pref(WATERMARK_PREF, str(top))
+        store.set_pref(_DIM_PREF, dim)
+        # "" while disabled: facts added meanwhile go unsigned, so re-enabling triggers a rebuild
+        store.set_pref(LSH_PARAMS_PREF, lsh_params)
+    return processed
@@ -0,0 +1,257 @@
+"""In-memory CSR snapshot of the relations graph.
+
+For whole-graph work (BFS over many hops, connected components, PageRank) the
+relations table is loaded once into compressed-sparse-row form: node names are
+interned to dense ints, and out-edges of node u are targets[offsets[u]:offsets[u+1]]
+(with the predicate id of each edge in edge_preds at the same position).
+
+The snapshot remembers the highest relations.id it has seen, so refresh() only
+reads newer edges. For a persistent LTM it is saved as relations.csr next to
+memory.db, and load_graph() starts from that file instead of rereading the table.
+"""
+from __future__ import annotations
+
+import json
+import os
+import struct
+from array import array
+from collections import deque
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+from .binio import from_le, le_bytes
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .store import LTM
+
+_MAGIC = b"NCSR"
+_FORMAT = 1
+# magic, format, watermark, nodes, preds, edges, header json length
+_HEADER = struct.Struct("<4sIqqqqq")
+
+
+def snapshot_path(ltm: "LTM") -> Path:
+    return ltm._config.db_path.with_name("relations.csr")
+
+
+class CSRGraph:
+    def __init__(self) -> None:
+        self._reset()
+
+    def _reset(self) -> None:
+        self.nodes: List[str] = []
+        self.node_ids: Dict[str, int] = {}
+        self.preds: List[str] = []
+        self.pred_ids: Dict[str, int] = {}
+        self.offsets = array("q", [0])
+        self.targets = array("i")
+        self.edge_preds = array("i")
+        # Highest relations.id included in the snapshot
+        self.watermark = 0
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.targets)
+
+    def _intern(self, name: str) -> int:
+        nid = self.node_ids.get(name)
+        if nid is None:
+            nid = self.node_ids[name] = len(self.nodes)
+            self.nodes.append(name)
+        return nid
+
+    def _intern_pred(self, name: str) -> int:
+        pid = self.pred_ids.get(name)
+        if pid is None:
+            pid = self.pred_ids[name] = len(self.preds)
+            self.preds.append(name)
+        return pid
+
+    def add_edges(self, edges: Sequence[Tuple[str, str, str]]) -> None:
+        """Merge (subj, pred, obj) edges into the CSR arrays (one counting-sort pass)."""
+        if not edges:
+            return
+        coded = [(self._intern(s), self._intern_pred(p), self._intern(o)) for s, p, o in edges]
+        n = len(self.nodes)
+        old_offsets = self.offsets
+        old_n = len(old_offsets) - 1
+        extra = [0] * n
+        for s, _p, _o in coded:
+            extra[s] += 1
+        offsets = array("q", bytes(8 * (n + 1)))
+        for u in range(n):
+            old = old_offsets[u + 1] - old_offsets[u] if u < old_n else 0
+            offsets[u + 1] = offsets[u] + old + extra[u]
+        total = offsets[n]
+        targets = array("i", bytes(4 * total))
+        preds = array("i", bytes(4 * total))
+        fill = array("q", offsets[:n])
+        for u in range(old_n):
+            lo, hi = old_offsets[u], old_offsets[u + 1]
+            if hi > lo:
+                at = fill[u]
+                targets[at : at + hi - lo] = self.targets[lo:hi]
+                preds[at : at + hi - lo] = self.edge_preds[lo:hi]
+                fill[u] = at + hi - lo
+        for s, p, o in coded:
+            at = fill[s]
+            targets[at] = o
+            preds[at] = p
+            fill[s] = at + 1
+        self.offsets, self.targets, self.edge_preds = offsets, targets, preds
+
+    def refresh(self, ltm: "LTM") -> int:
+        """Pull relations newer than the watermark; returns the number of edges added.
+
+        If the table is behind the watermark (DB replaced or reset) the snapshot is rebuilt.
+        """
+        conn = ltm._conn
+        top = conn.execute("SELECT COALESCE(MAX(id), 0) FROM relations").fetchone()[0]
+        if int(top) < self.watermark:
+            self._reset()
+        rows = conn.execute(
+            "SELECT id, subj, pred, obj FROM relations WHERE id > ? ORDER BY id", (self.watermark,)
+        ).fetchall()
+        if not rows:
+            return 0
+        self.add_edges([(str(s), str(p), str(o)) for _id, s, p, o in rows])
+        self.watermark = int(rows[-1][0])
+        return len(rows)
+
+    # Queries
+    def out_edges(self, node: str) -> Iterator[Tuple[str, str]]:
+        """(pred, obj) for each out-edge of node."""
+        u = self.node_ids.get(node)
+        if u is None:
+            return
+        for i in range(self.offsets[u], self.offsets[u + 1]):
+            yield self.preds[self.edge_preds[i]], self.nodes[self.targets[i]]
+
+    def bfs(self, start: str, max_depth: Optional[int] = None) -> Dict[str, int]:
+        """Hop distance from start to every node reachable along out-edges (start included at 0)."""
+        s = self.node_ids.get(start)
+        if s is None:
+            return {}
+        offsets, targets = self.offsets, self.targets
+        depth = {s: 0}
+        frontier = deque([s])
+        while frontier:
+            u = frontier.popleft()
+            d = depth[u]
+            if max_depth is not None and d >= max_depth:
+                continue
+            for v in targets[offsets[u] : offsets[u + 1]]:
+                if v not in depth:
+                    depth[v] = d + 1
+                    frontier.append(v)
+        return {self.nodes[u]: d for u, d in depth.items()}
+
+    def connected_components(self) -> List[Set[str]]:
+        """Weakly connected components, largest first."""
+        parent = list(range(len(self.nodes)))
+
+        def find(x: int) -> int:
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+
+        offsets, targets = self.offsets, self.targets
+        for u in range(len(self.nodes)):
+            for v in targets[offsets[u] : offsets[u + 1]]:
+                ru, rv = find(u), find(v)
+                if ru != rv:
+                    parent[max(ru, rv)] = min(ru, rv)
+        groups: Dict[int, Set[str]] = {}
+        for u, name in enumerate(self.nodes):
+            groups.setdefault(find(u), set()).add(name)
+        return sorted(groups.values(), key=lambda g: (-len(g), min(g)))
+
+    def pagerank(self, *, damping: float = 0.85, iterations: int = 50, tol: float = 1e-6) -> Dict[str, float]:
+        """PageRank over out-edges; dangling nodes spread their rank uniformly. Scores sum to 1."""
+        n = len(self.nodes)
+        if not n:
+            return {}
+        offsets, targets = self.offsets, self.targets
+        rank = [1.0 / n] * n
+        base = (1.0 - damping) / n
+        for _ in range(max(1, int(iterations))):
+            nxt = [0.0] * n
+            dangling = 0.0
+            for u in range(n):
+                lo, hi = offsets[u], offsets[u + 1]
+                if hi == lo:
+                    dangling += rank[u]
+                    continue
+                share = rank[u] / (hi - lo)
+                for v in targets[lo:hi]:
+                    nxt[v] += share
+            spread = base + damping * dangling / n
+            nxt = [spread + damping * x for x in nxt]
+            delta = sum(abs(a - b) for a, b in zip(nxt, rank))
+            rank = nxt
+            if delta < tol:
+                break
+        return {self.nodes[u]: r for u, r in enumerate(rank)}
+
+    # Persistence
+    def save(self, path: Path) -> None:
+        meta = json.dumps({"nodes": self.nodes, "preds": self.preds}, ensure_ascii=False).encode("utf-8")
+        header = _HEADER.pack(
+            _MAGIC, _FORMAT, self.watermark, len(self.nodes), len(self.preds), len(self.targets), len(meta)
+        )
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp, "wb") as f:
+            f.write(header)
+            f.write(meta)
+            f.write(le_bytes(self.offsets))
+            f.write(le_bytes(self.targets))
+            f.write(le_bytes(self.edge_preds))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["CSRGraph"]:
+        """Read a snapshot written by save(); None if missing, unreadable or another format."""
+        try:
+            data = path.read_bytes()
+            magic, fmt, watermark, n_nodes, n_preds, n_edges, meta_len = _HEADER.unpack_from(data)
+            if magic != _MAGIC or fmt != _FORMAT:
+                return None
+            pos = _HEADER.size
+            meta = json.loads(data[pos : pos + meta_len].decode("utf-8"))
+            pos += meta_len
+            sizes = ((8 * (n_nodes + 1)), 4 * n_edges, 4 * n_edges)
+            if len(data) != pos + sum(sizes) or len(meta["nodes"]) != n_nodes or len(meta["preds"]) != n_preds:
+                return None
+        except (OSError, ValueError, KeyError, struct.error):
+            return None
+        graph = cls()
+        graph.nodes = list(meta["nodes"])
+        graph.node_ids = {name: i for i, name in enumerate(graph.nodes)}
+        graph.preds = list(meta["preds"])
+        graph.pred_ids = {name: i for i, name in enumerate(graph.preds)}
+        graph.offsets = from_le("q", data[pos : pos + sizes[0]])
+        pos += sizes[0]
+        graph.targets = from_le("i", data[pos : pos + sizes[1]])
+        pos += sizes[1]
+        graph.edge_preds = from_le("i", data[pos : pos + sizes[2]])
+        graph.watermark = int(watermark)
+        return graph
+
+
+def load_graph(ltm: "LTM", *, persist: bool = True) -> CSRGraph:
+    """Current CSR snapshot of ltm's relations.
+
+    A persistent LTM starts from relations.csr (if present), pulls newer edges, and
+    rewrites the file when anything changed; an in-memory LTM builds from the table.
+    """
+    path = snapshot_path(ltm) if ltm.is_persistent() else None
+    graph = (CSRGraph.load(path) if path is not None else None) or CSRGraph()
+    before = graph.watermark
+    added = graph.refresh(ltm)
+    if persist and path is not None and (added or graph.watermark != before or not path.exists()):
+        graph.save(path)
+    return graph
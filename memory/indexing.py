@@ -4,13 +4,33 @@ Provides:
 - tokenize/index_text for keyword index
 - embed_text: small bag-of-ngrams vector with token synonyms
 - cosine_similarity for comparing sparse vectors
+- hash_vector/embed_dense: fixed-dimension float32 form of the embedding (feature hashing),
+  with pack_vector/unpack_vector for BLOB storage
+- embed_many and a process-wide LRU of embeddings keyed by a hash of the text
 """
 from __future__ import annotations
 
+import bisect
+import hashlib
+import heapq
+import json
+import operator
+import os
 import re
+import struct
+import sys
+import zlib
+from array import array
 from collections import defaultdict
-from typing import DefaultDict, Dict, Iterable, List, Set
+from pathlib import Path
+from typing import DefaultDict, Dict, Iterable, List, Optional, Sequence, Set, Tuple
 
+from .cache import LRUCache
+from .binio import from_le, le_bytes
+
+
+# Default width of the dense (hashed) embedding; override with NOVA_MEMORY_VECTOR_DIM
+VECTOR_DIM = 256
 
 TOKEN_RE = re.compile(r"[A-Za-z0-9_]+")
 STOPWORDS: Set[str] = {"the", "a", "an", "and", "or", "of", "to", "in", "on", "is", "it"}
@@ -30,9 +50,36 @@ def index_text(text: str) -> list[str]:
     return [t for t in tokenize(text) if t not in STOPWORDS]
 
 
+_TERMS_MAGIC = b"NTRM"
+_TERMS_FORMAT = 2  # 2: postings hold slots, mapped to doc ids by the docs section
+# magic, format, watermark, terms, postings, docs, header json length
+_TERMS_HEADER = struct.Struct("<4sIqqqqq")
+
+
 class InvertedIndex:
+    """Keyword postings plus weighted feature postings for candidate pruning.
+
+    add/query work on plain tokens. add_vector/candidates work on embed_text features and
+    keep a max weight per term so candidates() can skip documents that cannot reach the
+    top-k (MaxScore-style), making a lookup proportional to the postings that matter.
+
+    Feature postings are parallel arrays per term (slots ascending, float32 weights), so a
+    large index costs ~12 bytes per posting instead of a dict entry each. Every add_vector
+    takes a new slot, so postings are only ever appended; a re-added or removed document
+    leaves its old slot's postings behind as stale until they outnumber the live ones (or
+    save() runs) and one compaction pass drops them all. save()/load() persist the feature
+    postings with a watermark (the highest doc id covered), so a restart only has to embed
+    newer documents.
+    """
+
     def __init__(self) -> None:
         self._index: DefaultDict[str, Set[int]] = defaultdict(set)
+        self._postings: Dict[str, Tuple[array, array]] = {}
+        self._max_weight: Dict[str, float] = {}
+        # slot -> doc id, and each live doc's current slot; other slots are stale
+        self._slot_doc = array("q")
+        self._doc_slot: Dict[int, int] = {}
+        self.watermark = 0
 
     def add(self, doc_id: int, text: str) -> None:
         for tok in index_text(text):
@@ -46,6 +93,157 @@ class InvertedIndex:
                 result.update(self._index[tok])
         return result
 
+    def add_vector(self, doc_id: int, vec: Dict[str, float]) -> None:
+        doc_id = int(doc_id)
+        self.remove_vector(doc_id)
+        slot = len(self._slot_doc)
+        self._slot_doc.append(doc_id)
+        self._doc_slot[doc_id] = slot
+        for term, weight in vec.items():
+            if weight <= 0:
+                continue
+            lists = self._postings.get(term)
+            if lists is None:
+                lists = self._postings[term] = (array("q"), array("f"))
+            lists[0].append(slot)
+            lists[1].append(weight)
+            if weight > self._max_weight.get(term, 0.0):
+                self._max_weight[term] = weight
+
+    def remove_vector(self, doc_id: int) -> None:
+        # Max weights are left as (still valid) upper bounds
+        if self._doc_slot.pop(doc_id, None) is not None and self._stale() > max(len(self._doc_slot), 1024):
+            self._compact()
+
+    def _stale(self) -> int:
+        return len(self._slot_doc) - len(self._doc_slot)
+
+    def _compact(self) -> None:
+        """Drop the postings of stale slots and renumber the live ones (keeping their order)."""
+        if not self._stale():
+            return
+        remap = array("q", [-1]) * len(self._slot_doc)
+        slot_doc = array("q")
+        for slot in sorted(self._doc_slot.values()):
+            remap[slot] = len(slot_doc)
+            slot_doc.append(self._slot_doc[slot])
+        for term, (slots, weights) in list(self._postings.items()):
+            keep = [i for i, s in enumerate(slots) if remap[s] >= 0]
+            if keep:
+                self._postings[term] = (
+                    array("q", (remap[slots[i]] for i in keep)),
+                    array("f", (weights[i] for i in keep)),
+                )
+            else:
+                del self._postings[term]
+        self._slot_doc = slot_doc
+        self._doc_slot = {doc: slot for slot, doc in enumerate(slot_doc)}
+
+    def __len__(self) -> int:
+        return len(self._doc_slot)
+
+    def doc_ids(self) -> Set[int]:
+        return set(self._doc_slot)
+
+    def candidates(self, query: Dict[str, float], k: int, *, limit: int | None = None) -> List[int]:
+        """Return ids of documents that can rank in the top-k by dot product with query.
+
+        Terms are visited by decreasing upper bound (query weight x max posting weight). Once
+        the bounds of the remaining terms cannot lift an unseen document past the current k-th
+        partial score, later lists only update documents already collected.
+        Returns at most `limit` ids (default 4*k), best partial score first.
+        """
+        if k <= 0:
+            return []
+        terms = [
+            (term, qw, qw * self._max_weight[term])
+            for term, qw in query.items()
+            if qw > 0 and term in self._postings
+        ]
+        terms.sort(key=lambda t: t[2], reverse=True)
+        remaining = [0.0] * (len(terms) + 1)
+        for i in range(len(terms) - 1, -1, -1):
+            remaining[i] = remaining[i + 1] + terms[i][2]
+        acc: Dict[int, float] = {}  # by slot
+        slot_doc, doc_slot = self._slot_doc, self._doc_slot
+        stale = self._stale()
+        threshold = 0.0
+        for i, (term, qw, _ub) in enumerate(terms):
+            slots, weights = self._postings[term]
+            if len(acc) < k or remaining[i] > threshold:
+                for slot, w in zip(slots, weights):
+                    if stale and doc_slot.get(slot_doc[slot]) != slot:
+                        continue
+                    acc[slot] = acc.get(slot, 0.0) + qw * w
+            else:
+                # Non-essential list: only probe documents already in the running
+                n = len(slots)
+                for slot in acc:
+                    at = bisect.bisect_left(slots, slot)
+                    if at < n and slots[at] == slot:
+                        acc[slot] += qw * weights[at]
+            if len(acc) >= k:
+                threshold = heapq.nlargest(k, acc.values())[-1]
+        return [slot_doc[slot] for slot in heapq.nlargest(limit or 4 * k, acc, key=acc.__getitem__)]
+
+    # Persistence (feature postings only; keyword postings are not saved)
+    def save(self, path: Path) -> None:
+        self._compact()
+        terms = list(self._postings)
+        offsets = array("q", [0])
+        for term in terms:
+            offsets.append(offsets[-1] + len(self._postings[term][0]))
+        meta = json.dumps(
+            {"terms": terms, "max": [self._max_weight[t] for t in terms]}, ensure_ascii=False
+        ).encode("utf-8")
+        header = _TERMS_HEADER.pack(
+            _TERMS_MAGIC, _TERMS_FORMAT, self.watermark, len(terms), offsets[-1], len(self._slot_doc), len(meta)
+        )
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp, "wb") as f:
+            f.write(header)
+            f.write(meta)
+            f.write(le_bytes(offsets))
+            for term in terms:
+                f.write(le_bytes(self._postings[term][0]))
+            for term in terms:
+                f.write(le_bytes(self._postings[term][1]))
+            f.write(le_bytes(self._slot_doc))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["InvertedIndex"]:
+        """Read postings written by save(); None if missing, unreadable or another format."""
+        try:
+            data = path.read_bytes()
+            magic, fmt, watermark, n_terms, n_postings, n_docs, meta_len = _TERMS_HEADER.unpack_from(data)
+            if magic != _TERMS_MAGIC or fmt != _TERMS_FORMAT:
+                return None
+            pos = _TERMS_HEADER.size
+            meta = json.loads(data[pos : pos + meta_len].decode("utf-8"))
+            pos += meta_len
+            sizes = (8 * (n_terms + 1), 8 * n_postings, 4 * n_postings, 8 * n_docs)
+            if len(data) != pos + sum(sizes) or len(meta["terms"]) != n_terms or len(meta["max"]) != n_terms:
+                return None
+        except (OSError, ValueError, KeyError, struct.error):
+            return None
+        index = cls()
+        offsets = from_le("q", data[pos : pos + sizes[0]])
+        pos += sizes[0]
+        all_slots = from_le("q", data[pos : pos + sizes[1]])
+        pos += sizes[1]
+        all_weights = from_le("f", data[pos : pos + sizes[2]])
+        pos += sizes[2]
+        for i, term in enumerate(meta["terms"]):
+            lo, hi = offsets[i], offsets[i + 1]
+            index._postings[term] = (all_slots[lo:hi], all_weights[lo:hi])
+            index._max_weight[term] = float(meta["max"][i])
+        # save() compacts first, so slot i holds the i-th doc
+        index._slot_doc = from_le("q", data[pos : pos + sizes[3]])
+        index._doc_slot = {doc: slot for slot, doc in enumerate(index._slot_doc)}
+        index.watermark = int(watermark)
+        return index
+
 
 def _char_ngrams(text: str, n: int = 3) -> List[str]:
     s = ''.join(ch.lower() for ch in text if ch.isalnum() or ch.isspace())
@@ -66,12 +264,71 @@ def _expand_synonyms(tokens: List[str]) -> List[str]:
     return expanded
 
 
+# Identical texts are embedded once per process; resize with configure_embedding_cache()
+_EMBED_CACHE = LRUCache(max_entries=4096, max_bytes=16 * 1024 * 1024)
+
+
+def configure_embedding_cache(max_entries: int, max_bytes: int) -> None:
+    """Resize the process-wide embedding cache (max_entries=0 disables it)."""
+    global _EMBED_CACHE
+    if (_EMBED_CACHE.max_entries, _EMBED_CACHE.max_bytes) != (max(0, int(max_entries)), max(0, int(max_bytes))):
+        _EMBED_CACHE = LRUCache(max_entries=max_entries, max_bytes=max_bytes)
+
+
+def embedding_cache_stats() -> Dict[str, int]:
+    return _EMBED_CACHE.stats()
+
+
+def text_hash(text: str) -> bytes:
+    """Content hash used as the embedding cache key (also the DB cache key)."""
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+def _feature_size(feats: Dict[str, float]) -> int:
+    # Cheaper than cache.approx_size for the flat str -> float dicts embed_text returns
+    return sys.getsizeof(feats) + sum(49 + len(k) + 24 for k in feats)
+
+
+def remember_embedding(text: str, feats: Dict[str, float]) -> None:
+    """Seed the process cache (e.g. with features loaded from the DB)."""
+    _EMBED_CACHE.put(text_hash(text), dict(feats), size=_feature_size(feats))
+
+
+def cached_embedding(text: str) -> Dict[str, float] | None:
+    hit = _EMBED_CACHE.get(text_hash(text))
+    return dict(hit) if hit is not None else None
+
+
 def embed_text(text: str) -> Dict[str, float]:
-    """Create a tiny local embedding as a sparse vector.
+    """Create a tiny local embedding as a sparse vector (memoised per process).
 
     Features: token terms (minus stopwords) + character trigrams.
     Weights: term frequency normalized to unit length.
+    Returns a fresh dict each call, so callers may mutate it.
     """
+    key = text_hash(text)
+    hit = _EMBED_CACHE.get(key)
+    if hit is None:
+        hit = _embed(text)
+        _EMBED_CACHE.put(key, hit, size=_feature_size(hit))
+    return dict(hit)
+
+
+def embed_many(texts: Iterable[str]) -> List[Dict[str, float]]:
+    """embed_text for a batch; repeated texts in the batch are embedded once."""
+    seen: Dict[str, Dict[str, float]] = {}
+    out: List[Dict[str, float]] = []
+    for text in texts:
+        feats = seen.get(text)
+        if feats is None:
+            feats = seen[text] = embed_text(text)
+            out.append(feats)
+        else:
+            out.append(dict(feats))
+    return out
+
+
+def _embed(text: str) -> Dict[str, float]:
     toks = index_text(text)
     toks = _expand_synonyms(toks)
     grams = _char_ngrams(text)
@@ -92,3 +349,37 @@ def cosine_similarity(a: Dict[str, float], b: Dict[str, float]) -> float:
     if len(a) > len(b):
         a, b = b, a
     return sum(a[k] * b.get(k, 0.0) for k in a.keys())
+
+
+def hash_vector(vec: Dict[str, float], dim: int = VECTOR_DIM) -> array:
+    """Fold a sparse embedding into `dim` float32 slots (signed feature hashing), L2-normalized.
+
+    crc32 keeps slots stable across processes, unlike the salted built-in hash().
+    """
+    out = array("f", bytes(4 * dim))
+    for feat, weight in vec.items():
+        h = zlib.crc32(feat.encode("utf-8"))
+        out[h % dim] += weight if h & 0x80000000 else -weight
+    norm = sum(v * v for v in out) ** 0.5
+    if norm:
+        for i in range(dim):
+            out[i] /= norm
+    return out
+
+
+def embed_dense(text: str, dim: int = VECTOR_DIM) -> array:
+    return hash_vector(embed_text(text), dim)
+
+
+def pack_vector(vec: Sequence[float]) -> bytes:
+    """Serialize a dense vector as little-endian float32 bytes."""
+    return le_bytes(vec if isinstance(vec, array) and vec.typecode == "f" else array("f", vec))
+
+
+def unpack_vector(blob: bytes) -> array:
+    return from_le("f", blob)
+
+
+def dot(a: Sequence[float], b: Sequence[float]) -> float:
+    """Dot product of two dense vectors (cosine when both are unit length)."""
+    return float(sum(map(operator.mul, a, b)))
@@ -0,0 +1,109 @@
+"""MinHash signatures and banded LSH over character trigrams.
+
+Used by LTM.index_minhash/LTM.query_approx for approximate fact lookup that stays
+in SQLite: each fact's signature is split into bands, every band is hashed to a
+bucket stored in the lsh_buckets side table, and a query only reads the facts that
+share at least one bucket with it.
+
+Recall/latency knobs:
+- bands x rows (construction): more bands of fewer rows raise recall and candidates
+- bands probed and max_candidates (query time): fewer means faster, lower recall
+"""
+from __future__ import annotations
+
+import random
+import time
+import zlib
+from array import array
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, Iterable, List, Set
+
+from .indexing import _char_ngrams
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .store import LTM
+
+# Largest prime below 2**32; hash values stay within 32 bits for compact signatures
+_PRIME = 4294967291
+
+
+def shingles(text: str) -> Set[int]:
+    """crc32 of each character trigram of text (the same trigrams embed_text uses)."""
+    return {zlib.crc32(g.encode("utf-8")) for g in _char_ngrams(text)}
+
+
+@dataclass(frozen=True)
+class MinHasher:
+    bands: int = 16
+    rows: int = 4
+    seed: int = 1
+
+    @property
+    def num_perm(self) -> int:
+        return self.bands * self.rows
+
+    @property
+    def params(self) -> str:
+        return f"{self.bands}x{self.rows}:{self.seed}"
+
+    def _coeffs(self) -> List[tuple[int, int]]:
+        rng = random.Random(self.seed)
+        return [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(self.num_perm)]
+
+    def signature(self, text: str) -> array:
+        """MinHash signature (num_perm unsigned 32-bit values); all-max for texts without trigrams."""
+        hashes = shingles(text)
+        sig = array("I", [_PRIME] * self.num_perm)
+        if hashes:
+            for i, (a, b) in enumerate(_coeffs_cached(self)):
+                sig[i] = min((a * h + b) % _PRIME for h in hashes)
+        return sig
+
+    def band_buckets(self, sig: array) -> List[int]:
+        """One bucket id per band (crc32 of that band's slice of the signature)."""
+        r = self.rows
+        return [zlib.crc32(sig[i * r : (i + 1) * r].tobytes()) for i in range(self.bands)]
+
+
+_COEFFS: Dict[MinHasher, List[tuple[int, int]]] = {}
+
+
+def _coeffs_cached(hasher: MinHasher) -> List[tuple[int, int]]:
+    coeffs = _COEFFS.get(hasher)
+    if coeffs is None:
+        coeffs = _COEFFS[hasher] = hasher._coeffs()
+    return coeffs
+
+
+def estimate_jaccard(a: array, b: array) -> float:
+    """Fraction of signature slots that agree (an unbiased estimate of trigram Jaccard)."""
+    if not a or len(a) != len(b):
+        return 0.0
+    return sum(1 for x, y in zip(a, b) if x == y) / len(a)
+
+
+def benchmark(ltm: "LTM", queries: Iterable[str], *, top_k: int = 3, bands: int | None = None) -> Dict[str, float]:
+    """Compare query_approx against the exact query_semantic.
+
+    Returns mean latency (ms) for both paths and recall@k of the approximate results,
+    measured against the exact top-k.
+    """
+    exact_ms = approx_ms = 0.0
+    hits = total = n = 0
+    for q in queries:
+        t0 = time.perf_counter()
+        exact = {r[0] for r in ltm.query_semantic(q, top_k=top_k)}
+        t1 = time.perf_counter()
+        approx = {r[0] for r in ltm.query_approx(q, top_k=top_k, bands=bands)}
+        t2 = time.perf_counter()
+        exact_ms += (t1 - t0) * 1000
+        approx_ms += (t2 - t1) * 1000
+        hits += len(exact & approx)
+        total += len(exact)
+        n += 1
+    n = n or 1
+    return {
+        "exact_ms": exact_ms / n,
+        "approx_ms": approx_ms / n,
+        "recall": (hits / total) if total else 1.0,
+    }
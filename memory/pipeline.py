@@ -0,0 +1,128 @@
+"""Staged consolidation pipeline: read facts -> embed/extract in worker processes -> one writer.
+
+Facts are read from SQLite in keyset pages, and each page is one work item.
+Embedding (embed_text + hash_vector), relation extraction and (when a MinHasher is given)
+LSH signing are pure-Python CPU work, so pages fan out to a ProcessPoolExecutor. At most
+max_in_flight pages are outstanding, which bounds memory and gives backpressure when the
+writer falls behind. Results are
+written by the calling thread, in page order, one LTM.batch() transaction per page, so a
+long rebuild never holds the SQLite write lock for more than one page at a time.
+
+Small workloads (or workers <= 1) run inline to avoid process start-up costs.
+"""
+from __future__ import annotations
+
+import os
+from array import array
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import TYPE_CHECKING, Deque, Iterator, List, Optional, Sequence, Tuple
+
+from .indexing import embed_text, hash_vector
+from .lsh import MinHasher
+from .rules import engine
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .store import LTM
+
+FactRow = Tuple[int, str, str, Optional[int]]
+ChunkResult = Tuple[
+    List[Tuple[int, array]], List[Tuple[str, str, str, Optional[int]]], List[Tuple[int, array]]
+]
+
+
+def extract_relations(key: str, value: str) -> List[Tuple[str, str, str]]:
+    """(subj, pred, obj) triples implied by one fact, per the rules in memory.rules."""
+    return engine().extract(key, value)
+
+
+def _relations_for(rows: Sequence[FactRow]) -> List[Tuple[str, str, str, Optional[int]]]:
+    out: List[Tuple[str, str, str, Optional[int]]] = []
+    for _fid, key, value, sid in rows:
+        out.extend((s, p, o, sid) for s, p, o in extract_relations(str(key), str(value)))
+    return out
+
+
+def _signatures_for(rows: Sequence[FactRow], minhash: Optional[MinHasher]) -> List[Tuple[int, array]]:
+    if minhash is None:
+        return []
+    return [(int(fid), minhash.signature(str(value))) for fid, _key, value, _sid in rows]
+
+
+def process_chunk(rows: Sequence[FactRow], dim: int, minhash: Optional[MinHasher] = None) -> ChunkResult:
+    """Worker stage: dense vectors, relations and LSH signatures for one page (must stay picklable)."""
+    vectors = [(int(fid), hash_vector(embed_text(str(value)), dim)) for fid, _key, value, _sid in rows]
+    return vectors, _relations_for(rows), _signatures_for(rows, minhash)
+
+
+def fact_pages(store: "LTM", after_id: int, upto: int, page_size: int = 500) -> Iterator[List[FactRow]]:
+    """Facts with after_id < id <= upto, oldest first, one keyset page at a time."""
+    while True:
+        rows = store._conn.execute(
+            "SELECT id, key, value, source_id FROM facts WHERE id > ? AND id <= ? ORDER BY id LIMIT ?",
+            (after_id, upto, page_size),
+        ).fetchall()
+        if not rows:
+            return
+        yield [(int(r[0]), str(r[1]), str(r[2]), r[3]) for r in rows]
+        after_id = int(rows[-1][0])
+
+
+def _write(store: "LTM", result: ChunkResult) -> int:
+    vectors, relations, signatures = result
+    with store.batch():
+        store.upsert_fact_vectors_many(vectors)
+        if relations:
+            store.add_relations_many(relations)
+        if signatures:
+            store.add_minhash_many(signatures)
+    return len(vectors)
+
+
+def resolve_workers(store: "LTM", workers: Optional[int] = None) -> int:
+    n = store.settings.memory_pipeline_workers if workers is None else workers
+    return max(1, int(n) if n and int(n) > 0 else (os.cpu_count() or 1))
+
+
+def run_pipeline(
+    store: "LTM",
+    after_id: int,
+    upto: int,
+    *,
+    workers: Optional[int] = None,
+    chunk_size: int = 500,
+    max_in_flight: Optional[int] = None,
+    minhash: Optional[MinHasher] = None,
+) -> int:
+    """Embed and extract relations for facts in (after_id, upto]; returns facts processed.
+
+    With minhash (the store's MinHasher) the facts are also signed into the LSH side tables.
+    """
+    workers = resolve_workers(store, workers)
+    dim = store._vector_dim
+    pending = int(
+        store._conn.execute(
+            "SELECT COUNT(*) FROM facts WHERE id > ? AND id <= ?", (after_id, upto)
+        ).fetchone()[0]
+    )
+    processed = 0
+    if workers <= 1 or pending <= chunk_size:
+        for page in fact_pages(store, after_id, upto, chunk_size):
+            feats = store.embed_many(value for _fid, _key, value, _sid in page)
+            vectors = [(fid, hash_vector(f, dim)) for (fid, _k, _v, _s), f in zip(page, feats)]
+            processed += _write(store, (vectors, _relations_for(page), _signatures_for(page, minhash)))
+        return processed
+    limit = max(1, max_in_flight if max_in_flight is not None else 2 * workers)
+    with ProcessPoolExecutor(max_workers=min(workers, -(-pending // chunk_size))) as pool:
+        in_flight: Deque[Future] = deque()
+        try:
+            for page in fact_pages(store, after_id, upto, chunk_size):
+                in_flight.append(pool.submit(process_chunk, page, dim, minhash))
+                if len(in_flight) >= limit:
+                    processed += _write(store, in_flight.popleft().result())
+            while in_flight:
+                processed += _write(store, in_flight.popleft().result())
+        finally:
+            for fut in in_flight:
+                fut.cancel()
+    return processed
@@ -0,0 +1,177 @@
+"""Event retention: per-day rollups, cold JSONL archive, and incremental vacuum.
+
+compact_events() moves raw events older than the retention window out of the hot
+`events` table:
+- counts are rolled up into event_rollups(day, type, count)
+- raw rows are written to gzip-compressed JSONL segments under <data_dir>/archive
+  and indexed in event_archive (id range, time range, types) so
+  LTM.get_events(..., include_archive=True) can still read them
+- freed pages are returned with PRAGMA incremental_vacuum (a DB created without
+  auto_vacuum is converted by a one-time VACUUM on its first compaction)
+
+Archiving needs a persistent LTM and permission to write the archive directory;
+without it raw rows are kept (unless archive=False, which drops them after rollup).
+"""
+from __future__ import annotations
+
+import gzip
+import json
+import os
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional
+
+from nova.permissions import Decision, request_permission
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .store import LTM
+
+
+def archive_dir(ltm: "LTM") -> Path:
+    return ltm.settings.data_dir / "archive"
+
+
+def _write_segment(path: Path, rows: List[tuple]) -> None:
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with gzip.open(tmp, "wt", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(list(row), ensure_ascii=False) + "\n")
+    os.replace(tmp, path)
+
+
+def compact_events(
+    ltm: "LTM",
+    *,
+    older_than_days: Optional[int] = None,
+    archive: bool = True,
+    segment_size: int = 10000,
+    full_vacuum: bool = False,
+    now: Optional[datetime] = None,
+) -> Dict[str, int]:
+    """Roll up and move events older than the retention window out of the hot table.
+
+    older_than_days defaults to settings.memory_event_retention_days (0 disables).
+    A DB created without auto_vacuum is converted (one full VACUUM) the first time events move,
+    so later runs can vacuum incrementally; full_vacuum forces a full VACUUM on every run.
+    Returns counts: events moved, segments written, rollup rows touched.
+    """
+    from .store import _sqlite_ts
+
+    days = ltm.settings.memory_event_retention_days if older_than_days is None else older_than_days
+    result = {"events": 0, "segments": 0, "rollups": 0}
+    if days is None or days <= 0:
+        return result
+    cutoff = _sqlite_ts((now or datetime.now(timezone.utc)) - timedelta(days=days))
+    target: Optional[Path] = None
+    if archive:
+        if not ltm.is_persistent():
+            return result
+        target = archive_dir(ltm)
+        decision = request_permission(action="write event archive", resource=str(target), path=target)
+        if decision is not Decision.APPROVED:
+            return result
+        target.mkdir(parents=True, exist_ok=True)
+
+    after_id = 0
+    while True:
+        rows = ltm._conn.execute(
+            "SELECT id, type, content, created_at FROM events WHERE created_at < ? AND id > ? ORDER BY id LIMIT ?",
+            (cutoff, after_id, int(segment_size)),
+        ).fetchall()
+        if not rows:
+            break
+        first_id, last_id = int(rows[0][0]), int(rows[-1][0])
+        after_id = last_id
+        rollups = Counter((str(r[3])[:10], str(r[1])) for r in rows)
+        segment = f"events-{first_id:010d}-{last_id:010d}.jsonl.gz"
+        if target is not None:
+            _write_segment(target / segment, rows)
+        with ltm.batch():
+            cur = ltm._conn.cursor()
+            cur.executemany(
+                "INSERT INTO event_rollups(day, type, count) VALUES (?, ?, ?) "
+                "ON CONFLICT(day, type) DO UPDATE SET count = count + excluded.count",
+                ((day, typ, n) for (day, typ), n in rollups.items()),
+            )
+            if target is not None:
+                cur.execute(
+                    "INSERT OR REPLACE INTO event_archive(segment, first_id, last_id, min_created, max_created, "
+                    "count, types) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        segment,
+                        first_id,
+                        last_id,
+                        min(str(r[3]) for r in rows),
+                        max(str(r[3]) for r in rows),
+                        len(rows),
+                        ",".join(sorted({str(r[1]) for r in rows})),
+                    ),
+                )
+            cur.executemany("DELETE FROM events WHERE id = ?", ((r[0],) for r in rows))
+        result["events"] += len(rows)
+        result["segments"] += 1 if target is not None else 0
+        result["rollups"] += len(rollups)
+
+    if result["events"]:
+        ltm.flush()
+        # VACUUM can't run inside a transaction; holding batch() keeps other writers out meanwhile
+        with ltm.batch():
+            conn = ltm._conn
+            if full_vacuum or int(conn.execute("PRAGMA auto_vacuum").fetchone()[0]) == 0:
+                # auto_vacuum set on a DB that already has tables only takes effect through VACUUM
+                conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+                conn.execute("VACUUM")
+            else:
+                # executescript steps the pragma to completion; execute() frees a single page
+                conn.executescript("PRAGMA incremental_vacuum;")
+    return result
+
+
+def event_rollups(ltm: "LTM", type_: Optional[str] = None) -> List[tuple[str, str, int]]:
+    """Archived event counts as (day, type, count), newest day first."""
+    sql = "SELECT day, type, count FROM event_rollups"
+    params: tuple[Any, ...] = ()
+    if type_ is not None:
+        sql += " WHERE type = ?"
+        params = (type_,)
+    return [(str(d), str(t), int(c)) for d, t, c in ltm._conn.execute(sql + " ORDER BY day DESC, type", params)]
+
+
+def iter_archived_events(
+    ltm: "LTM",
+    type_: Optional[str] = None,
+    *,
+    before_id: Optional[int] = None,
+    since: Optional[str] = None,
+) -> Iterator[tuple[int, str, str, str]]:
+    """Yield archived events newest first, reading only segments the index says can match."""
+    clauses = ["1=1"]
+    params: List[Any] = []
+    if before_id is not None:
+        clauses.append("first_id < ?")
+        params.append(int(before_id))
+    if since is not None:
+        clauses.append("max_created >= ?")
+        params.append(since)
+    segments = ltm._conn.execute(
+        f"SELECT segment, types FROM event_archive WHERE {' AND '.join(clauses)} ORDER BY last_id DESC",
+        tuple(params),
+    ).fetchall()
+    base = archive_dir(ltm)
+    for segment, types in segments:
+        if type_ is not None and type_ not in str(types).split(","):
+            continue
+        path = base / str(segment)
+        if not path.exists():
+            continue
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+        for eid, typ, content, created in reversed(rows):
+            if type_ is not None and typ != type_:
+                continue
+            if before_id is not None and eid >= before_id:
+                continue
+            if since is not None and created < since:
+                continue
+            yield (int(eid), str(typ), str(content), str(created))
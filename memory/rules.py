@@ -0,0 +1,204 @@
+"""Declarative relation-extraction rules for consolidation.
+
+A RelationRule maps facts to (subj, pred, obj) triples. A fact matches on a key prefix
+("capital:"), a value regex, or both. Triple templates can use:
+
+- {key}: the whole key
+- {rest}: the key after the prefix
+- {value}: the fact value
+- any named group of the rule's pattern
+
+Each substituted field is stripped, and title-cased unless title=False. A triple with an
+empty field is dropped.
+
+All registered rules are compiled into one RuleEngine:
+- Prefix rules sit in a character trie, so a key reaches every rule whose prefix it
+  starts with in a single walk of the key. Rules with a pattern then run it on the value.
+- Value-only rules (no prefix) are joined into one alternation, with group names made
+  unique per rule. It is a prefilter: one search tells whether any of them can match,
+  and only then does each rule scan the value with its own pattern (so overlapping
+  rules all fire). Leading inline flags ("(?i)...") are scoped to the rule ("(?i:...)").
+  A rule that can't share the alternation (numbered backreferences such as \\1) always
+  scans on its own.
+
+Adding rules therefore grows the trie and the alternation, while a fact that no value rule
+matches still costs one pass. Register rules at import time so ProcessPoolExecutor workers (memory.pipeline)
+see them too.
+"""
+from __future__ import annotations
+
+import re
+import string
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Pattern, Tuple
+
+Triple = Tuple[str, str, str]
+
+_GROUP_DEF = re.compile(r"\(\?P<([A-Za-z_]\w*)>")
+_GROUP_REF = re.compile(r"\(\?P=([A-Za-z_]\w*)\)")
+_GLOBAL_FLAGS = re.compile(r"\(\?([aiLmsux]+)\)")
+# \1..\99 or (?(1)...): group numbers shift once the pattern is joined with others
+_NUMBERED_REF = re.compile(r"(?<!\\)(?:\\\\)*\\[1-9]|\(\?\(\d")
+
+
+def _scoped(pattern: str) -> str:
+    """Rewrite leading global flags "(?i)x" as "(?i:x)" so the pattern can sit inside a group."""
+    flags = ""
+    pos = 0
+    while True:
+        m = _GLOBAL_FLAGS.match(pattern, pos)
+        if m is None:
+            break
+        flags += m.group(1)
+        pos = m.end()
+    return f"(?{flags}:{pattern[pos:]})" if flags else pattern
+
+
+@dataclass(frozen=True)
+class RelationRule:
+    name: str
+    triples: Tuple[Triple, ...]
+    prefix: str = ""
+    pattern: Optional[str] = None
+    title: bool = True
+
+    def __post_init__(self) -> None:
+        if not self.prefix and not self.pattern:
+            raise ValueError(f"rule {self.name!r} needs a key prefix, a value pattern, or both")
+        if not self.triples:
+            raise ValueError(f"rule {self.name!r} has no triples")
+        groups = set(re.compile(self.pattern).groupindex) if self.pattern else set()
+        allowed = {"key", "rest", "value"} | groups
+        for triple in self.triples:
+            for part in triple:
+                for _lit, field, _spec, _conv in string.Formatter().parse(part):
+                    if field is not None and field not in allowed:
+                        raise ValueError(f"rule {self.name!r}: unknown template field {{{field}}}")
+
+    def render(self, fields: Dict[str, str]) -> List[Triple]:
+        clean = {k: (v or "").strip() for k, v in fields.items()}
+        if self.title:
+            clean = {k: v.title() for k, v in clean.items()}
+        out: List[Triple] = []
+        for s, p, o in self.triples:
+            triple = (s.format_map(clean).strip(), p.format_map(clean).strip(), o.format_map(clean).strip())
+            if all(triple):
+                out.append(triple)
+        return out
+
+
+class _TrieNode:
+    __slots__ = ("children", "rules")
+
+    def __init__(self) -> None:
+        self.children: Dict[str, _TrieNode] = {}
+        self.rules: List[int] = []  # indices of rules whose prefix ends here
+
+
+class RuleEngine:
+    def __init__(self, rules: Iterable[RelationRule]) -> None:
+        self.rules: List[RelationRule] = list(rules)
+        self._trie = _TrieNode()
+        self._patterns: Dict[int, Pattern[str]] = {}
+        alternatives: List[str] = []
+        # Value-only rules in registration order: (index, pattern, screened by the prefilter)
+        self._value_rules: List[Tuple[int, Pattern[str], bool]] = []
+        for i, rule in enumerate(self.rules):
+            if rule.prefix:
+                node = self._trie
+                for ch in rule.prefix:
+                    node = node.children.setdefault(ch, _TrieNode())
+                node.rules.append(i)
+                if rule.pattern:
+                    self._patterns[i] = re.compile(rule.pattern)
+                continue
+            assert rule.pattern is not None
+            alternative = self._alternative(i, rule.pattern)
+            if alternative is not None:
+                alternatives.append(alternative)
+            self._value_rules.append((i, re.compile(rule.pattern), alternative is not None))
+        self._values: Optional[Pattern[str]] = re.compile("|".join(alternatives)) if alternatives else None
+
+    @staticmethod
+    def _alternative(i: int, pattern: str) -> Optional[str]:
+        """The rule's pattern as one branch of the prefilter, or None if it can't be one."""
+        if _NUMBERED_REF.search(pattern):
+            return None
+        tag = f"_r{i}"
+        renamed = _GROUP_DEF.sub(lambda m: f"(?P<{tag}_{m.group(1)}>", _scoped(pattern))
+        renamed = _GROUP_REF.sub(lambda m: f"(?P={tag}_{m.group(1)})", renamed)
+        alternative = f"(?:{renamed})"
+        try:
+            re.compile(alternative)
+        except re.error:
+            return None
+        return alternative
+
+    def _prefix_rules(self, key: str) -> List[int]:
+        hits: List[int] = []
+        node = self._trie
+        for ch in key:
+            child = node.children.get(ch)
+            if child is None:
+                break
+            hits.extend(child.rules)
+            node = child
+        return hits
+
+    def extract(self, key: str, value: str) -> List[Triple]:
+        """All triples the rules produce for one fact (duplicates removed, rule order kept)."""
+        out: List[Triple] = []
+        for i in self._prefix_rules(key):
+            rule = self.rules[i]
+            fields = {"key": key, "rest": key[len(rule.prefix) :], "value": value}
+            pattern = self._patterns.get(i)
+            if pattern is not None:
+                m = pattern.search(value)
+                if m is None:
+                    continue
+                fields.update({k: v for k, v in m.groupdict().items() if v is not None})
+            out.extend(rule.render(fields))
+        screened = self._values is not None and self._values.search(value) is not None
+        for i, pattern, prefiltered in self._value_rules:
+            if prefiltered and not screened:
+                continue
+            for m in pattern.finditer(value):
+                fields = {"key": key, "rest": key, "value": value}
+                fields.update({k: v for k, v in m.groupdict().items() if v is not None})
+                out.extend(self.rules[i].render(fields))
+        return list(dict.fromkeys(out))
+
+
+RULES: List[RelationRule] = [
+    RelationRule(
+        name="capital",
+        prefix="capital:",
+        triples=(("{rest}", "capital_of", "{value}"), ("{value}", "is_capital_of", "{rest}")),
+    ),
+]
+
+_ENGINE: Optional[RuleEngine] = None
+
+
+def register(rule: RelationRule) -> None:
+    """Add a rule to the default registry (replacing any rule with the same name).
+
+    The engine is rebuilt right away, so a rule that can't be compiled raises ValueError
+    here and leaves the registry unchanged.
+    """
+    global _ENGINE
+    rules = [r for r in RULES if r.name != rule.name] + [rule]
+    try:
+        compiled = RuleEngine(rules)
+    except re.error as exc:
+        raise ValueError(f"rule {rule.name!r} does not compile: {exc}") from exc
+    RULES[:] = rules
+    _ENGINE = compiled
+
+
+def engine() -> RuleEngine:
+    """The compiled engine for the current registry (rebuilt after register())."""
+    global _ENGINE
+    if _ENGINE is None:
+        _ENGINE = RuleEngine(RULES)
+    return _ENGINE
@@ -1,15 +1,166 @@
 """Memory module: STM and LTM (SQLite) with gated persistence."""
 from __future__ import annotations
 
+import functools
+import gzip
+import hashlib
+import json
+import logging
+import os
+import queue
+import shutil
 import sqlite3
+import threading
+import time
+from array import array
 from collections import deque
+from concurrent.futures import Future
+from contextlib import contextmanager
 from dataclasses import dataclass
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Deque, Optional, Tuple, Dict
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, TypeVar
 
 from nova.config import Settings
 from nova.permissions import request_permission, Decision
 
+from .cache import LRUCache
+from .indexing import InvertedIndex, configure_embedding_cache
+from .lsh import MinHasher, estimate_jaccard
+from .vectors import VectorIndex
+
+
+logger = logging.getLogger("nova.memory")
+
+# Allowed values for the string pragmas in the Settings profile (pragma values can't be bound)
+_JOURNAL_MODES = {"delete", "truncate", "persist", "memory", "wal", "off"}
+_SYNCHRONOUS = {"off", "normal", "full", "extra"}
+_TEMP_STORES = {"default", "file", "memory"}
+
+# Bumped whenever a schema upgrade step is added to LTM._migrations()
+SCHEMA_VERSION = 9
+
+# A load that adds at least this many facts to the term index rewrites facts.terms right away
+# (otherwise the snapshot is brought up to date on close)
+_TERMS_SAVE_ROWS = 1000
+
+# Pref holding the MinHasher params the LSH side tables were built with ("" = not maintained)
+LSH_PARAMS_PREF = "lsh:params"
+
+
+def _content_hash(*parts: Optional[str]) -> bytes:
+    """16-byte digest of the given strings (unit-separated); used for UNIQUE dedup columns."""
+    data = "\x1f".join("" if p is None else str(p) for p in parts)
+    return hashlib.blake2b(data.encode("utf-8"), digest_size=16).digest()
+
+
+def _url_hash(url: Optional[str]) -> Optional[bytes]:
+    # Empty URLs are not deduplicated (NULLs don't collide under UNIQUE)
+    return _content_hash(url) if url else None
+
+
+def _sqlite_ts(value: datetime | str) -> str:
+    """Format a datetime like SQLite's CURRENT_TIMESTAMP (UTC, 'YYYY-MM-DD HH:MM:SS')."""
+    if isinstance(value, str):
+        return value
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.strftime("%Y-%m-%d %H:%M:%S")
+
+
+_F = TypeVar("_F", bound=Callable[..., Any])
+
+
+def _writes(method: _F) -> _F:
+    """Mark an LTM mutator; on a thread-safe LTM it runs on the writer thread."""
+
+    @functools.wraps(method)
+    def wrapper(self: "LTM", *args: Any, **kwargs: Any) -> Any:
+        if self._batch_depth:
+            return method(self, *args, **kwargs)
+        writer = self._writer
+        if writer is not None:
+            return writer.submit(method, self, args, kwargs)
+        if self._commit_interval and self.write_behind:
+            return self._timed_write(method, args, kwargs)
+        return method(self, *args, **kwargs)
+
+    return wrapper  # type: ignore[return-value]
+
+
+_STAT_SCOPES = {
+    "event_type": "event_types",
+    "fact_namespace": "fact_namespaces",
+    "facts_day": "facts_per_day",
+    "events_day": "events_per_day",
+}
+
+
+def read_stats(conn: sqlite3.Connection) -> Dict[str, Any]:
+    """Decode the stats table (see LTM.stats); usable on a read-only connection."""
+    out: Dict[str, Any] = {"facts": 0, "events": 0, **{k: {} for k in _STAT_SCOPES.values()}}
+    for scope, name, count in conn.execute("SELECT scope, name, count FROM stats WHERE count > 0"):
+        if scope == "total":
+            out[str(name)] = int(count)
+        elif scope in _STAT_SCOPES:
+            out[_STAT_SCOPES[scope]][str(name)] = int(count)
+    return out
+
+
+def stats_from_file(db_path: Path) -> Optional[Dict[str, Any]]:
+    """stats() of a memory DB opened read-only, without the LTM permission flow (for diagnostics)."""
+    if not db_path.exists():
+        return None
+    try:
+        conn = sqlite3.connect(f"{db_path.resolve().as_uri()}?mode=ro", uri=True)
+    except sqlite3.Error:
+        return None
+    try:
+        return read_stats(conn)
+    except sqlite3.Error:
+        return None  # DB predates the stats table
+    finally:
+        conn.close()
+
+
+class _WriterThread(threading.Thread):
+    """Single writer for a thread-safe LTM: drains queued writes and commits them as one group."""
+
+    def __init__(self, ltm: "LTM", *, max_group: int = 256) -> None:
+        super().__init__(name="nova-ltm-writer", daemon=True)
+        self._ltm = ltm
+        self._max_group = max_group
+        self._queue: "queue.Queue[Optional[tuple[Callable[..., Any], tuple, dict, Future]]]" = queue.Queue()
+        self.groups = 0
+
+    def submit(self, fn: Callable[..., Any], ltm: "LTM", args: tuple, kwargs: dict) -> Any:
+        fut: Future = Future()
+        self._queue.put((fn, args, kwargs, fut))
+        return fut.result()
+
+    def stop(self) -> None:
+        self._queue.put(None)
+        self.join()
+
+    def run(self) -> None:
+        stop = False
+        while not stop:
+            item = self._queue.get()
+            if item is None:
+                return
+            group = [item]
+            while len(group) < self._max_group:
+                try:
+                    nxt = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if nxt is None:
+                    stop = True
+                    break
+                group.append(nxt)
+            self._ltm._run_write_group(group)
+            self.groups += 1
+
 
 class STM:
     """Simple short-term memory buffer (no persistence)."""
@@ -36,9 +187,13 @@ class LTM:
 
     On initialization, requests permission to use a persistent DB at C:\\Nova\\data\\memory.db.
     If denied or unavailable, falls back to in-memory DB for the session.
+
+    With threadsafe=True (or NOVA_MEMORY_THREADSAFE) one LTM can be shared by threads such as
+    nova.scheduler callbacks: each thread reads through its own connection and writes are
+    queued to a single writer thread that commits them in groups.
     """
 
-    def __init__(self, settings: Optional[Settings] = None) -> None:
+    def __init__(self, settings: Optional[Settings] = None, *, threadsafe: Optional[bool] = None) -> None:
         self.settings = settings or Settings()
         file_path = self.settings.data_dir / "memory.db"
         decision = request_permission(
@@ -47,13 +202,106 @@ class LTM:
             path=file_path,
         )
         self._config = LTMConfig(db_path=file_path, persistent=(decision is Decision.APPROVED))
-        self._conn = self._connect()
+        # Write path state: per-thread batch() depth, write-behind bookkeeping, writer thread
+        self._local = threading.local()
+        self._write_lock = threading.RLock()
+        self._index_lock = threading.RLock()
+        self._threadsafe = self.settings.memory_threadsafe if threadsafe is None else bool(threadsafe)
+        self._writer: Optional[_WriterThread] = None
+        # Per-thread reader connections with their owning thread (closed once it has exited)
+        self._readers: List[Tuple[threading.Thread, sqlite3.Connection]] = []
+        self._readers_lock = threading.Lock()
+        self._db_file: Optional[str] = None
+        self._pending_writes = 0
+        self._pending_since: Optional[float] = None
+        self._flush_timer: Optional[threading.Timer] = None
+        self._commit_every = max(0, int(self.settings.memory_commit_every))
+        self._commit_interval = max(0, int(self.settings.memory_commit_interval_ms)) / 1000.0
+        self._vindex: Optional[VectorIndex] = None
+        self._tindex: Optional[InvertedIndex] = None
+        # Watermark of the facts.terms snapshot on disk
+        self._terms_saved = 0
+        # Read-through cache for key lookups, citations and prefs; invalidated by writes through this LTM
+        self._cache = LRUCache(
+            max_entries=self.settings.memory_cache_entries,
+            max_bytes=self.settings.memory_cache_bytes,
+            ttl_seconds=self.settings.memory_cache_ttl_s,
+        )
+        configure_embedding_cache(self.settings.memory_embed_cache_entries, self.settings.memory_embed_cache_bytes)
+        self._minhasher = MinHasher(
+            bands=max(1, int(self.settings.memory_lsh_bands)), rows=max(1, int(self.settings.memory_lsh_rows))
+        )
+        self._vector_dim = max(8, int(self.settings.memory_vector_dim))
+        self._main = self._connect()
         self._init_schema()
+        if self._threadsafe:
+            self._writer = _WriterThread(self)
+            self._writer.start()
 
     def _connect(self) -> sqlite3.Connection:
+        # A thread-safe LTM hands its main connection to the writer thread (and, in memory, to readers);
+        # with a commit interval the write-behind flush timer commits from its own thread
+        check = not (self._threadsafe or self._commit_interval)
         if self._config.persistent and self.settings.data_dir.exists():
-            return sqlite3.connect(str(self._config.db_path))
-        return sqlite3.connect(":memory:")
+            self._db_file = str(self._config.db_path)
+            timeout = max(0, int(self.settings.sqlite_busy_timeout_ms)) / 1000.0
+            conn = sqlite3.connect(self._db_file, timeout=timeout, check_same_thread=check)
+        else:
+            conn = sqlite3.connect(":memory:", check_same_thread=check)
+        # Only takes effect before the first table exists (memory.retention converts older DBs once)
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        self._apply_pragmas(conn)
+        return conn
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        """Connection for the calling thread.
+
+        The main connection unless this is a thread-safe LTM and the caller is a reader
+        (not inside batch() and not the writer thread); readers get a per-thread connection.
+        """
+        if self._writer is None or self._batch_depth:
+            return self._main
+        return self._reader()
+
+    def _reader(self) -> sqlite3.Connection:
+        conn: Optional[sqlite3.Connection] = getattr(self._local, "reader", None)
+        if conn is not None:
+            return conn
+        if self._db_file is None:
+            # A private in-memory DB can't be opened twice; SQLite serializes use of the one connection
+            return self._main
+        timeout = max(0, int(self.settings.sqlite_busy_timeout_ms)) / 1000.0
+        conn = sqlite3.connect(self._db_file, timeout=timeout, check_same_thread=False)
+        self._apply_pragmas(conn)
+        conn.execute("PRAGMA query_only=ON")
+        self._local.reader = conn
+        with self._readers_lock:
+            # Short-lived threads (e.g. scheduler timers) would otherwise each leave a connection open
+            dead = [c for t, c in self._readers if not t.is_alive()]
+            self._readers = [(t, c) for t, c in self._readers if t.is_alive()]
+            self._readers.append((threading.current_thread(), conn))
+        for old in dead:
+            old.close()
+        return conn
+
+    def _apply_pragmas(self, conn: sqlite3.Connection) -> None:
+        """Apply the Settings pragma profile; unknown values are skipped with a warning."""
+        s = self.settings
+        choices = (
+            ("journal_mode", s.sqlite_journal_mode, _JOURNAL_MODES),
+            ("synchronous", s.sqlite_synchronous, _SYNCHRONOUS),
+            ("temp_store", s.sqlite_temp_store, _TEMP_STORES),
+        )
+        for name, value, allowed in choices:
+            v = str(value).strip().lower()
+            if v not in allowed:
+                logger.warning("ignoring invalid sqlite %s=%r", name, value)
+                continue
+            conn.execute(f"PRAGMA {name}={v}")
+        conn.execute(f"PRAGMA busy_timeout={max(0, int(s.sqlite_busy_timeout_ms))}")
+        conn.execute(f"PRAGMA mmap_size={max(0, int(s.sqlite_mmap_size))}")
+        conn.execute(f"PRAGMA cache_size={int(s.sqlite_cache_size)}")
 
     def _init_schema(self) -> None:
         cur = self._conn.cursor()
@@ -99,7 +347,8 @@ class LTM:
             """
             CREATE TABLE IF NOT EXISTS fact_vectors (
                 fact_id INTEGER PRIMARY KEY,
-                vector_json TEXT NOT NULL,
+                dim INTEGER NOT NULL,
+                vector BLOB NOT NULL,
                 FOREIGN KEY(fact_id) REFERENCES facts(id) ON DELETE CASCADE
             )
             """
@@ -118,58 +367,757 @@ class LTM:
             """
         )
         self._conn.commit()
+        self._migrate()
+
+    # Schema upgrades (tracked with PRAGMA user_version)
+    def _migrations(self) -> list[tuple[int, Callable[[sqlite3.Cursor], None]]]:
+        return [
+            (1, self._migrate_v1_indexes),
+            (2, self._migrate_v2_binary_vectors),
+            (3, self._migrate_v3_minhash_tables),
+            (4, self._migrate_v4_fulltext),
+            (5, self._migrate_v5_event_retention),
+            (6, self._migrate_v6_graph_indexes),
+            (7, self._migrate_v7_dedup),
+            (8, self._migrate_v8_embedding_cache),
+            (9, self._migrate_v9_stats),
+        ]
+
+    def _migrate(self) -> None:
+        """Apply each idempotent upgrade step newer than the DB's user_version."""
+        cur = self._conn.cursor()
+        current = int(cur.execute("PRAGMA user_version").fetchone()[0])
+        for version, step in self._migrations():
+            if current >= version:
+                continue
+            step(cur)
+            cur.execute(f"PRAGMA user_version = {int(version)}")
+            self._conn.commit()
+            current = version
+
+    def schema_version(self) -> int:
+        return int(self._conn.execute("PRAGMA user_version").fetchone()[0])
+
+    def _migrate_v1_indexes(self, cur: sqlite3.Cursor) -> None:
+        # Secondary indexes for the hot lookups; (col, id DESC) also serves the newest-first ORDER BY
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_facts_key ON facts(key, id DESC)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_facts_source ON facts(source_id)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_events_type ON events(type, id DESC)")
+
+    def _migrate_v2_binary_vectors(self, cur: sqlite3.Cursor) -> None:
+        """Convert fact_vectors from JSON feature dicts to packed float32 BLOBs."""
+        import json as _json
+        from .indexing import hash_vector, pack_vector
+        cols = {str(r[1]) for r in cur.execute("PRAGMA table_info(fact_vectors)").fetchall()}
+        if "vector_json" not in cols:
+            return
+        dim = self._vector_dim
+        cur.execute(
+            """
+            CREATE TABLE fact_vectors_v2 (
+                fact_id INTEGER PRIMARY KEY,
+                dim INTEGER NOT NULL,
+                vector BLOB NOT NULL,
+                FOREIGN KEY(fact_id) REFERENCES facts(id) ON DELETE CASCADE
+            )
+            """
+        )
+        rows = self._conn.execute("SELECT fact_id, vector_json FROM fact_vectors")
+        cur.executemany(
+            "INSERT INTO fact_vectors_v2(fact_id, dim, vector) VALUES (?, ?, ?)",
+            ((fid, dim, pack_vector(hash_vector(_json.loads(vj), dim))) for fid, vj in rows),
+        )
+        cur.execute("DROP TABLE fact_vectors")
+        cur.execute("ALTER TABLE fact_vectors_v2 RENAME TO fact_vectors")
+
+    def _migrate_v3_minhash_tables(self, cur: sqlite3.Cursor) -> None:
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS fact_minhash (
+                fact_id INTEGER PRIMARY KEY,
+                signature BLOB NOT NULL
+            )
+            """
+        )
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS lsh_buckets (
+                band INTEGER NOT NULL,
+                bucket INTEGER NOT NULL,
+                fact_id INTEGER NOT NULL,
+                PRIMARY KEY(band, bucket, fact_id)
+            ) WITHOUT ROWID
+            """
+        )
+
+    def _migrate_v4_fulltext(self, cur: sqlite3.Cursor) -> None:
+        """FTS5 indexes over facts.value and events.content, kept in sync by triggers."""
+        specs = (
+            ("facts", "facts_fts", "key", "value"),
+            ("events", "events_fts", "type", "content"),
+        )
+        for table, fts, label, text in specs:
+            try:
+                cur.execute(
+                    f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+                    f"{label}, {text}, content='{table}', content_rowid='id')"
+                )
+            except sqlite3.OperationalError:
+                logger.warning("SQLite built without FTS5; search_text falls back to LIKE scans")
+                return
+            cur.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {table}_fts_ai AFTER INSERT ON {table} BEGIN "
+                f"INSERT INTO {fts}(rowid, {label}, {text}) VALUES (new.id, new.{label}, new.{text}); END"
+            )
+            cur.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {table}_fts_ad AFTER DELETE ON {table} BEGIN "
+                f"INSERT INTO {fts}({fts}, rowid, {label}, {text}) VALUES ('delete', old.id, old.{label}, old.{text}); "
+                "END"
+            )
+            cur.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {table}_fts_au AFTER UPDATE OF {label}, {text} ON {table} BEGIN "
+                f"INSERT INTO {fts}({fts}, rowid, {label}, {text}) VALUES ('delete', old.id, old.{label}, old.{text}); "
+                f"INSERT INTO {fts}(rowid, {label}, {text}) VALUES (new.id, new.{label}, new.{text}); END"
+            )
+            cur.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+    def _migrate_v5_event_retention(self, cur: sqlite3.Cursor) -> None:
+        """Tables for memory.retention: per-day rollups and the cold archive segment index."""
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_events_created ON events(created_at)")
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS event_rollups (
+                day TEXT NOT NULL,
+                type TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY(day, type)
+            ) WITHOUT ROWID
+            """
+        )
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS event_archive (
+                segment TEXT PRIMARY KEY,
+                first_id INTEGER NOT NULL,
+                last_id INTEGER NOT NULL,
+                min_created TEXT NOT NULL,
+                max_created TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                types TEXT NOT NULL
+            )
+            """
+        )
+
+    def _migrate_v6_graph_indexes(self, cur: sqlite3.Cursor) -> None:
+        # Multi-hop walks filter by predicate on both edge directions; (subj, pred) is already
+        # served by the UNIQUE(subj, pred, obj) autoindex
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_relations_obj_pred ON relations(obj, pred)")
+        # Single-column indexes from older DBs: prefixes of the two above, so only write cost
+        cur.execute("DROP INDEX IF EXISTS idx_relations_subj")
+        cur.execute("DROP INDEX IF EXISTS idx_relations_obj")
+
+    def _migrate_v7_dedup(self, cur: sqlite3.Cursor) -> None:
+        """Content-address facts (key, value) and sources (url); merge existing duplicates.
+
+        Citations move to the fact_sources link table; facts.source_id keeps the first source.
+        Duplicate sources collapse onto the oldest row, duplicate facts onto the newest (so
+        newest-first lookups still see them first); side tables follow the surviving ids.
+        """
+        for table, column in (("facts", "content_hash"), ("sources", "url_hash")):
+            cols = {str(r[1]) for r in cur.execute(f"PRAGMA table_info({table})").fetchall()}
+            if column not in cols:
+                cur.execute(f"ALTER TABLE {table} ADD COLUMN {column} BLOB")
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS fact_sources (
+                fact_id INTEGER NOT NULL,
+                source_id INTEGER NOT NULL,
+                PRIMARY KEY(fact_id, source_id)
+            ) WITHOUT ROWID
+            """
+        )
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_fact_sources_source ON fact_sources(source_id)")
+
+        rows = cur.execute("SELECT id, url FROM sources WHERE url_hash IS NULL").fetchall()
+        cur.executemany("UPDATE sources SET url_hash = ? WHERE id = ?", ((_url_hash(url), sid) for sid, url in rows))
+        rows = cur.execute("SELECT id, key, value FROM facts WHERE content_hash IS NULL").fetchall()
+        cur.executemany(
+            "UPDATE facts SET content_hash = ? WHERE id = ?", ((_content_hash(k, v), fid) for fid, k, v in rows)
+        )
+
+        cur.execute("DROP TABLE IF EXISTS temp.dedup_map")
+        cur.execute("CREATE TEMP TABLE dedup_map (old INTEGER PRIMARY KEY, new INTEGER NOT NULL)")
+        cur.execute(
+            "INSERT INTO temp.dedup_map(old, new) SELECT s.id, k.keep FROM sources s JOIN ("
+            " SELECT url_hash, MIN(id) AS keep FROM sources WHERE url_hash IS NOT NULL GROUP BY url_hash"
+            " HAVING COUNT(*) > 1) k ON k.url_hash = s.url_hash WHERE s.id <> k.keep"
+        )
+        for table in ("facts", "relations"):
+            cur.execute(
+                f"UPDATE {table} SET source_id = (SELECT new FROM temp.dedup_map WHERE old = {table}.source_id)"
+                " WHERE source_id IN (SELECT old FROM temp.dedup_map)"
+            )
+        cur.execute("DELETE FROM sources WHERE id IN (SELECT old FROM temp.dedup_map)")
+        cur.execute(
+            "INSERT OR IGNORE INTO fact_sources(fact_id, source_id) "
+            "SELECT id, source_id FROM facts WHERE source_id IS NOT NULL"
+        )
+
+        cur.execute("DELETE FROM temp.dedup_map")
+        cur.execute(
+            "INSERT INTO temp.dedup_map(old, new) SELECT f.id, k.keep FROM facts f JOIN ("
+            " SELECT content_hash, MAX(id) AS keep FROM facts GROUP BY content_hash HAVING COUNT(*) > 1"
+            ") k ON k.content_hash = f.content_hash WHERE f.id <> k.keep"
+        )
+        cur.execute(
+            "INSERT OR IGNORE INTO fact_sources(fact_id, source_id) "
+            "SELECT m.new, fs.source_id FROM fact_sources fs JOIN temp.dedup_map m ON m.old = fs.fact_id"
+        )
+        cur.execute(
+            "UPDATE facts SET source_id = (SELECT MIN(fs.source_id) FROM fact_sources fs WHERE fs.fact_id = facts.id)"
+            " WHERE source_id IS NULL AND id IN (SELECT new FROM temp.dedup_map)"
+        )
+        for table in ("fact_sources", "fact_vectors", "fact_minhash", "lsh_buckets"):
+            cur.execute(f"DELETE FROM {table} WHERE fact_id IN (SELECT old FROM temp.dedup_map)")
+        cur.execute("DELETE FROM facts WHERE id IN (SELECT old FROM temp.dedup_map)")
+        cur.execute("DROP TABLE temp.dedup_map")
+
+        cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_facts_content_hash ON facts(content_hash)")
+        cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_sources_url_hash ON sources(url_hash)")
+
+    def _migrate_v8_embedding_cache(self, cur: sqlite3.Cursor) -> None:
+        # Sparse embed_text features (JSON) keyed by indexing.text_hash; used when the cache is persisted
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embedding_cache (
+                hash BLOB PRIMARY KEY,
+                features TEXT NOT NULL
+            ) WITHOUT ROWID
+            """
+        )
+
+    def _migrate_v9_stats(self, cur: sqlite3.Cursor) -> None:
+        """Materialised counts kept current by triggers on facts and events (read by stats())."""
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS stats (
+                scope TEXT NOT NULL,
+                name TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY(scope, name)
+            ) WITHOUT ROWID
+            """
+        )
+        namespace = "CASE WHEN instr({k}, ':') > 0 THEN substr({k}, 1, instr({k}, ':') - 1) ELSE {k} END"
+        counters = {
+            "facts": [
+                ("'total'", "'facts'"),
+                ("'fact_namespace'", namespace.format(k="{row}.key")),
+                ("'facts_day'", "date({row}.created_at)"),
+            ],
+            "events": [
+                ("'total'", "'events'"),
+                ("'event_type'", "{row}.type"),
+                ("'events_day'", "date({row}.created_at)"),
+            ],
+        }
+        for table, scopes in counters.items():
+            for op, row, sign in (("insert", "NEW", 1), ("delete", "OLD", -1)):
+                body = "".join(
+                    f"INSERT INTO stats(scope, name, count) VALUES ({scope}, {name.format(row=row)}, {sign}) "
+                    f"ON CONFLICT(scope, name) DO UPDATE SET count = count + ({sign});"
+                    for scope, name in scopes
+                )
+                cur.execute(
+                    f"CREATE TRIGGER IF NOT EXISTS {table}_stats_{op[:1]} AFTER {op.upper()} ON {table} "
+                    f"BEGIN {body} END"
+                )
+        cur.execute("DELETE FROM stats")
+        for table, scopes in counters.items():
+            for scope, name in scopes:
+                cur.execute(
+                    f"INSERT INTO stats(scope, name, count) "
+                    f"SELECT {scope}, {name.format(row=table)}, COUNT(*) FROM {table} GROUP BY 2"
+                )
+
+    def explain_query_plan(self, sql: str, params: Sequence[Any] = ()) -> list[str]:
+        """Return the detail lines of EXPLAIN QUERY PLAN for sql (used to guard index usage)."""
+        cur = self._conn.cursor()
+        cur.execute("EXPLAIN QUERY PLAN " + sql, tuple(params))
+        return [str(r[-1]) for r in cur.fetchall()]
+
+    # Write path
+    @property
+    def _batch_depth(self) -> int:
+        return int(getattr(self._local, "depth", 0))
+
+    @_batch_depth.setter
+    def _batch_depth(self, value: int) -> None:
+        self._local.depth = value
+
+    @property
+    def write_behind(self) -> bool:
+        if self._threadsafe:
+            return False  # the writer thread already groups commits
+        return self._commit_every > 1 or self._commit_interval > 0
+
+    def _commit(self) -> None:
+        """Commit after a write unless grouped by batch() or deferred by write-behind."""
+        if self._batch_depth:
+            return
+        if not self.write_behind:
+            self._conn.commit()
+            return
+        now = time.monotonic()
+        if self._pending_since is None:
+            self._pending_since = now
+        self._pending_writes += 1
+        if (self._commit_every and self._pending_writes >= self._commit_every) or (
+            self._commit_interval and now - self._pending_since >= self._commit_interval
+        ):
+            self.flush()
+        elif self._commit_interval and self._flush_timer is None:
+            # Commit when the interval expires even if no further write arrives
+            self._flush_timer = threading.Timer(self._commit_interval, self._timed_flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def _timed_write(self, method: Callable[..., Any], args: tuple, kwargs: dict) -> Any:
+        """Run a write-behind write under the write lock, so the flush timer can't commit mid-write."""
+        hooks: List[Callable[[], None]] = []
+        try:
+            with self._write_lock:
+                self._local.hooks = hooks
+                try:
+                    return method(self, *args, **kwargs)
+                finally:
+                    self._local.hooks = None
+        finally:
+            for fn in hooks:
+                fn()
+
+    def _timed_flush(self) -> None:
+        try:
+            self.flush()
+        except sqlite3.Error as exc:
+            logger.warning("write-behind flush failed: %s", exc)
+
+    def flush(self) -> None:
+        """Commit any writes still pending from write-behind mode."""
+        with self._write_lock:
+            timer, self._flush_timer = self._flush_timer, None
+            if timer is not None:
+                timer.cancel()
+            if self._main.in_transaction:
+                self._main.commit()
+            self._pending_writes = 0
+            self._pending_since = None
+
+    def _reset_resident(self) -> None:
+        # Resident indexes and caches may hold rolled-back writes
+        with self._index_lock:
+            self._vindex = None
+            self._tindex = None
+        self._cache.clear()
+
+    def _after_commit(self, fn: Callable[[], None]) -> None:
+        """Run fn once the current write is committed and the write lock is released.
+
+        Inside batch() or a writer group fn is queued (and dropped if that write rolls back);
+        otherwise it runs now. Cache invalidation goes through here so that a reader on its own
+        connection can't re-cache pre-commit rows after the invalidation. Resident-index updates
+        do too: readers take _index_lock before they may need the writer, so it must never be
+        taken under _write_lock.
+        """
+        hooks: Optional[List[Callable[[], None]]] = getattr(self._local, "hooks", None)
+        if hooks is None:
+            fn()
+        else:
+            hooks.append(fn)
+
+    @contextmanager
+    def batch(self) -> Iterator["LTM"]:
+        """Group all writes in the block into one transaction.
+
+        Commits once on exit and rolls back on error. Nested batches join the outermost one.
+        On a thread-safe LTM the block holds the write lock and its writes run inline.
+        """
+        outer = self._batch_depth == 0
+        hooks: List[Callable[[], None]] = []
+        if outer:
+            self._write_lock.acquire()
+            try:
+                self.flush()
+            except BaseException:
+                self._write_lock.release()
+                raise
+            self._local.hooks = hooks
+        self._batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._batch_depth -= 1
+            if outer:
+                self._local.hooks = None
+                try:
+                    self._main.rollback()
+                finally:
+                    self._write_lock.release()
+                self._reset_resident()
+            raise
+        self._batch_depth -= 1
+        if outer:
+            self._local.hooks = None
+            try:
+                self.flush()
+            finally:
+                self._write_lock.release()
+            for fn in hooks:
+                fn()
+
+    def _run_write_group(self, group: List[tuple[Callable[..., Any], tuple, dict, Future]]) -> None:
+        """Run queued writes in one transaction (each under a savepoint) and commit once."""
+        outcomes: List[tuple[Future, Any, Optional[BaseException]]] = []
+        conn = self._main
+        hooks: List[Callable[[], None]] = []
+        reset = False
+        with self._write_lock:
+            self._batch_depth = 1
+            self._local.hooks = hooks
+            try:
+                if not conn.in_transaction:
+                    conn.execute("BEGIN IMMEDIATE")
+                for fn, args, kwargs, fut in group:
+                    mark = len(hooks)
+                    conn.execute("SAVEPOINT ltm_write")
+                    try:
+                        result = fn(self, *args, **kwargs)
+                    except BaseException as exc:
+                        conn.execute("ROLLBACK TO ltm_write")
+                        conn.execute("RELEASE ltm_write")
+                        del hooks[mark:]
+                        reset = True
+                        outcomes.append((fut, None, exc))
+                    else:
+                        conn.execute("RELEASE ltm_write")
+                        outcomes.append((fut, result, None))
+                conn.commit()
+            except BaseException as exc:
+                if conn.in_transaction:
+                    conn.rollback()
+                hooks.clear()
+                reset = True
+                outcomes = [(fut, None, exc) for _fn, _a, _k, fut in group]
+            finally:
+                self._batch_depth = 0
+                self._local.hooks = None
+        if reset:
+            self._reset_resident()
+        for hook in hooks:
+            hook()
+        for fut, result, err in outcomes:
+            if err is not None:
+                fut.set_exception(err)
+            else:
+                fut.set_result(result)
 
     # Facts
+    @_writes
     def add_fact(self, key: str, value: str, source_id: Optional[int] = None) -> int:
-        cur = self._conn.cursor()
-        cur.execute("INSERT INTO facts(key, value, source_id) VALUES (?, ?, ?)", (key, value, source_id))
-        self._conn.commit()
-        return int(cur.lastrowid)
+        """Store a fact, or return the id of the identical (key, value) fact already stored.
 
-    def get_facts(self, key: Optional[str] = None) -> list[tuple[int, str, str, Optional[int], str]]:
+        Re-adding a fact that is no longer the newest for its key moves it to a fresh id, so
+        newest-first lookups serve the re-learned value. source_id, if given, is linked to the
+        fact either way (see fact_sources).
+        """
+        digest = _content_hash(key, value)
         cur = self._conn.cursor()
-        if key is None:
-            cur.execute("SELECT id, key, value, source_id, created_at FROM facts ORDER BY id DESC")
+        # NOT EXISTS rather than ON CONFLICT: a skipped upsert would still burn an AUTOINCREMENT id
+        cur.execute(
+            "INSERT INTO facts(key, value, source_id, content_hash) SELECT ?, ?, ?, ? "
+            "WHERE NOT EXISTS (SELECT 1 FROM facts WHERE content_hash = ?)",
+            (key, value, source_id, digest, digest),
+        )
+        if cur.rowcount > 0:
+            fact_id = int(cur.lastrowid)
         else:
+            found, newest = cur.execute(
+                "SELECT id, (SELECT MAX(id) FROM facts WHERE key = ?) FROM facts WHERE content_hash = ?",
+                (key, digest),
+            ).fetchone()
+            fact_id = int(found) if found == newest else self._reassert_fact(cur, int(found))
+        if source_id is not None:
             cur.execute(
-                "SELECT id, key, value, source_id, created_at FROM facts WHERE key = ? ORDER BY id DESC",
-                (key,),
+                "INSERT OR IGNORE INTO fact_sources(fact_id, source_id) VALUES (?, ?)", (fact_id, source_id)
             )
+        self._commit()
+        self._after_commit(lambda: self._cache.invalidate_tag(("key", key)))
+        return fact_id
+
+    def _reassert_fact(self, cur: sqlite3.Cursor, old_id: int) -> int:
+        """Re-insert a stored fact under a new (newest) id; citations, vector and LSH rows follow it."""
+        row = cur.execute("SELECT key, value, source_id, content_hash FROM facts WHERE id = ?", (old_id,)).fetchone()
+        # Release the UNIQUE hash first; the old row is deleted once side tables point at the new id
+        cur.execute("UPDATE facts SET content_hash = NULL WHERE id = ?", (old_id,))
+        cur.execute("INSERT INTO facts(key, value, source_id, content_hash) VALUES (?, ?, ?, ?)", tuple(row))
+        assert cur.lastrowid is not None
+        new_id = cur.lastrowid
+        for table in ("fact_sources", "fact_vectors", "fact_minhash", "lsh_buckets"):
+            cur.execute(f"UPDATE {table} SET fact_id = ? WHERE fact_id = ?", (new_id, old_id))
+        cur.execute("DELETE FROM facts WHERE id = ?", (old_id,))
+        self._after_commit(lambda: self._drop_resident(old_id))
+        return new_id
+
+    def _drop_resident(self, fact_id: int) -> None:
+        # The new id is past the watermark, so _vector_index() loads it from the table
+        with self._index_lock:
+            if self._vindex is not None:
+                self._vindex.remove(fact_id)
+            if self._tindex is not None:
+                self._tindex.remove_vector(fact_id)
+
+    def get_facts(
+        self,
+        key: Optional[str] = None,
+        *,
+        limit: Optional[int] = None,
+        before_id: Optional[int] = None,
+        since: Optional[datetime | str] = None,
+        prefix: Optional[str] = None,
+    ) -> list[tuple[int, str, str, Optional[int], str]]:
+        """Facts newest first, optionally for one key or key prefix; limit/before_id page through by id.
+
+        Plain key lookups (no before_id/since/prefix) are served from the LTM cache when possible.
+        Use get_facts_by_prefix instead when key order is fine; it needs no sort.
+        """
+        cacheable = key is not None and before_id is None and since is None and prefix is None
+        if cacheable:
+            hit = self._cache.get(("facts", key, limit))
+            if hit is not None:
+                return list(hit)
+        rows = self._select_page(
+            "SELECT id, key, value, source_id, created_at FROM facts", "key", key, limit, before_id, since, prefix
+        )
+        if cacheable:
+            self._cache.put(("facts", key, limit), tuple(rows), tag=("key", key))
+        return rows
+
+    def iter_facts(
+        self,
+        key: Optional[str] = None,
+        *,
+        batch_size: int = 500,
+        before_id: Optional[int] = None,
+        since: Optional[datetime | str] = None,
+        prefix: Optional[str] = None,
+    ) -> Iterator[tuple[int, str, str, Optional[int], str]]:
+        """Stream facts newest first, fetching batch_size rows per keyset-paginated query."""
+        while True:
+            page = self.get_facts(key, limit=batch_size, before_id=before_id, since=since, prefix=prefix)
+            yield from page
+            if len(page) < batch_size:
+                return
+            before_id = int(page[-1][0])
+
+    @staticmethod
+    def _prefix_range(prefix: str) -> Optional[Tuple[str, str]]:
+        """[lo, hi) bounds matching every key that starts with prefix (None for an empty prefix)."""
+        stem = prefix
+        while stem and ord(stem[-1]) >= 0x10FFFF:
+            stem = stem[:-1]
+        if not stem:
+            return None
+        return prefix, stem[:-1] + chr(ord(stem[-1]) + 1)
+
+    def get_facts_by_prefix(
+        self, prefix: str, limit: Optional[int] = None, after: Optional[Tuple[str, int]] = None
+    ) -> list[tuple[int, str, str, Optional[int], str]]:
+        """Facts whose key starts with prefix (e.g. "learned:"), in key order, newest first per key.
+
+        Runs as a range scan on idx_facts_key (key >= prefix AND key < next prefix) and returns
+        rows in that index's (key, id DESC) order, so no page needs a sort. after is the keyset
+        cursor: pass (key, id) of the last row of the previous page to get the next page.
+        """
+        bounds = self._prefix_range(prefix)
+        sql = "SELECT id, key, value, source_id, created_at FROM facts"
+        clauses: list[str] = []
+        params: list[object] = []
+        if after is not None:
+            after_key, after_id = str(after[0]), int(after[1])
+            clauses.append("key >= ? AND (key > ? OR id < ?)")
+            params.extend((max(after_key, prefix), after_key, after_id))
+            if bounds is not None:
+                clauses.append("key < ?")
+                params.append(bounds[1])
+        elif bounds is not None:
+            clauses.append("key >= ? AND key < ?")
+            params.extend(bounds)
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY key, id DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(max(0, int(limit)))
+        cur = self._conn.cursor()
+        cur.execute(sql, tuple(params))
+        return list(cur.fetchall())
+
+    def iter_facts_by_prefix(
+        self, prefix: str, *, batch_size: int = 500
+    ) -> Iterator[tuple[int, str, str, Optional[int], str]]:
+        """Stream get_facts_by_prefix pages (key order, newest first per key)."""
+        after: Optional[Tuple[str, int]] = None
+        while True:
+            page = self.get_facts_by_prefix(prefix, batch_size, after)
+            yield from page
+            if len(page) < batch_size:
+                return
+            after = (str(page[-1][1]), int(page[-1][0]))
+
+    def count_facts_by_prefix(self, prefix: str) -> int:
+        """Number of facts whose key starts with prefix (index-only range count)."""
+        bounds = self._prefix_range(prefix)
+        if bounds is None:
+            return int(self.stats()["facts"])
+        cur = self._conn.cursor()
+        cur.execute("SELECT COUNT(*) FROM facts WHERE key >= ? AND key < ?", bounds)
+        return int(cur.fetchone()[0])
+
+    def namespace_counts(self) -> Dict[str, int]:
+        """Fact counts per key namespace (the key up to its first ':'), from the stats table."""
+        return dict(self.stats()["fact_namespaces"])
+
+    def _select_page(
+        self,
+        select: str,
+        column: str,
+        value: Optional[str],
+        limit: Optional[int],
+        before_id: Optional[int],
+        since: Optional[datetime | str],
+        prefix: Optional[str] = None,
+    ) -> list[Any]:
+        clauses: list[str] = []
+        params: list[object] = []
+        if value is not None:
+            clauses.append(f"{column} = ?")
+            params.append(value)
+        bounds = self._prefix_range(prefix) if prefix is not None else None
+        if bounds is not None:
+            clauses.append(f"{column} >= ? AND {column} < ?")
+            params.extend(bounds)
+        if before_id is not None:
+            clauses.append("id < ?")
+            params.append(int(before_id))
+        if since is not None:
+            clauses.append("created_at >= ?")
+            params.append(_sqlite_ts(since))
+        sql = select
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY id DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(max(0, int(limit)))
+        cur = self._conn.cursor()
+        cur.execute(sql, tuple(params))
         return list(cur.fetchall())
 
     # Events
+    @_writes
     def log_event(self, type_: str, content: str) -> int:
         cur = self._conn.cursor()
         cur.execute("INSERT INTO events(type, content) VALUES (?, ?)", (type_, content))
-        self._conn.commit()
+        self._commit()
         return int(cur.lastrowid)
 
-    def get_events(self, type_: Optional[str] = None) -> list[tuple[int, str, str, str]]:
-        cur = self._conn.cursor()
-        if type_ is None:
-            cur.execute("SELECT id, type, content, created_at FROM events ORDER BY id DESC")
-        else:
-            cur.execute("SELECT id, type, content, created_at FROM events WHERE type = ? ORDER BY id DESC", (type_,))
-        return list(cur.fetchall())
+    def get_events(
+        self,
+        type_: Optional[str] = None,
+        *,
+        limit: Optional[int] = None,
+        before_id: Optional[int] = None,
+        since: Optional[datetime | str] = None,
+        include_archive: bool = False,
+    ) -> list[tuple[int, str, str, str]]:
+        """Events newest first, optionally of one type; limit/before_id page through by id.
+
+        include_archive=True continues into events moved to the cold archive by memory.retention.
+        """
+        rows = self._select_page(
+            "SELECT id, type, content, created_at FROM events", "type", type_, limit, before_id, since
+        )
+        if include_archive and (limit is None or len(rows) < limit):
+            from .retention import iter_archived_events
+            archived = iter_archived_events(
+                self,
+                type_,
+                before_id=int(rows[-1][0]) if rows else before_id,
+                since=_sqlite_ts(since) if since is not None else None,
+            )
+            for row in archived:
+                if limit is not None and len(rows) >= limit:
+                    break
+                rows.append(row)
+        return rows
+
+    def iter_events(
+        self,
+        type_: Optional[str] = None,
+        *,
+        batch_size: int = 500,
+        before_id: Optional[int] = None,
+        since: Optional[datetime | str] = None,
+    ) -> Iterator[tuple[int, str, str, str]]:
+        """Stream events newest first, fetching batch_size rows per keyset-paginated query."""
+        while True:
+            page = self.get_events(type_, limit=batch_size, before_id=before_id, since=since)
+            yield from page
+            if len(page) < batch_size:
+                return
+            before_id = int(page[-1][0])
 
     # Prefs
+    @_writes
     def set_pref(self, key: str, value: str) -> None:
         cur = self._conn.cursor()
         cur.execute("INSERT INTO prefs(key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value=excluded.value", (key, value))
-        self._conn.commit()
+        self._commit()
+        self._after_commit(lambda: self._cache.invalidate(("pref", key)))
 
     def get_pref(self, key: str) -> Optional[str]:
+        hit = self._cache.get(("pref", key))
+        if hit is not None:
+            cached: Optional[str] = hit[0]
+            return cached
         cur = self._conn.cursor()
         cur.execute("SELECT value FROM prefs WHERE key = ?", (key,))
         row = cur.fetchone()
-        return row[0] if row else None
+        value = row[0] if row else None
+        self._cache.put(("pref", key), (value,))
+        return value
 
     # Sources
+    @_writes
     def add_source(self, url: str, title: str) -> int:
+        """Store a source, or return the id of the one with the same URL (refreshing a blank title)."""
+        digest = _url_hash(url)
         cur = self._conn.cursor()
-        cur.execute("INSERT INTO sources(url, title) VALUES (?, ?)", (url, title))
-        self._conn.commit()
-        return int(cur.lastrowid)
+        cur.execute(
+            "INSERT INTO sources(url, title, url_hash) SELECT ?, ?, ? "
+            "WHERE ? IS NULL OR NOT EXISTS (SELECT 1 FROM sources WHERE url_hash = ?)",
+            (url, title, digest, digest, digest),
+        )
+        if cur.rowcount > 0:
+            source_id = int(cur.lastrowid)
+        else:
+            source_id = int(cur.execute("SELECT id FROM sources WHERE url_hash = ?", (digest,)).fetchone()[0])
+            if title:
+                cur.execute(
+                    "UPDATE sources SET title = ? WHERE id = ? AND COALESCE(title, '') = ''", (title, source_id)
+                )
+        self._commit()
+        return source_id
 
     def get_source(self, source_id: int) -> Optional[tuple[int, str, str]]:
         cur = self._conn.cursor()
@@ -178,79 +1126,476 @@ class LTM:
         return (int(row[0]), str(row[1]), str(row[2])) if row else None
 
     # Aggregation helpers
+    @_writes
     def add_fact_with_sources(self, key: str, value: str, sources: list[tuple[str, str]]) -> int:
         """Store a fact and attach multiple sources; returns fact id.
 
         sources: list of (url, title)
         """
-        last_id = -1
-        for url, title in sources:
-            sid = self.add_source(url, title)
-            last_id = self.add_fact(key, value, source_id=sid)
-        if last_id == -1:
-            last_id = self.add_fact(key, value, source_id=None)
-        return last_id
+        with self.batch():
+            source_ids = [self.add_source(url, title) for url, title in sources]
+            fact_id = self.add_fact(key, value, source_id=source_ids[0] if source_ids else None)
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO fact_sources(fact_id, source_id) VALUES (?, ?)",
+                ((fact_id, sid) for sid in source_ids[1:]),
+            )
+        return fact_id
 
     def get_citation_urls_for_key(self, key: str, limit: int = 5) -> list[str]:
-        """Return up to 'limit' citation URLs associated with facts for this key."""
-        urls: list[str] = []
+        """Return up to 'limit' citation URLs associated with facts for this key (newest first)."""
+        hit = self._cache.get(("cites", key, limit))
+        if hit is not None:
+            return list(hit)
         cur = self._conn.cursor()
-        cur.execute("SELECT source_id FROM facts WHERE key = ? AND source_id IS NOT NULL ORDER BY id DESC", (key,))
-        rows = cur.fetchall()
-        seen = set()
-        for (sid,) in rows:
-            cur.execute("SELECT url FROM sources WHERE id = ?", (sid,))
-            r = cur.fetchone()
-            if r and r[0] and r[0] not in seen:
-                urls.append(str(r[0]))
-                seen.add(r[0])
-                if len(urls) >= limit:
-                    break
+        cur.execute(
+            "SELECT s.url FROM facts f JOIN fact_sources fs ON fs.fact_id = f.id JOIN sources s ON s.id = fs.source_id "
+            "WHERE f.key = ? AND s.url IS NOT NULL AND s.url != '' "
+            "GROUP BY s.url ORDER BY MAX(f.id) DESC LIMIT ?",
+            (key, int(limit)),
+        )
+        urls = [str(r[0]) for r in cur.fetchall()]
+        self._cache.put(("cites", key, limit), tuple(urls), tag=("key", key))
         return urls
 
+    def get_citation_urls_for_keys(self, keys: Iterable[str], limit: int = 5) -> Dict[str, list[str]]:
+        """Batched get_citation_urls_for_key: one query per 500 keys instead of one per fact row.
+
+        Returns {key: urls} for every requested key (empty list when a key has no citations).
+        """
+        wanted = list(dict.fromkeys(keys))
+        result: Dict[str, list[str]] = {k: [] for k in wanted}
+        cur = self._conn.cursor()
+        for i in range(0, len(wanted), 500):
+            chunk = wanted[i : i + 500]
+            placeholders = ",".join("?" for _ in chunk)
+            cur.execute(
+                "SELECT key, url FROM ("
+                " SELECT f.key AS key, s.url AS url,"
+                "  ROW_NUMBER() OVER (PARTITION BY f.key ORDER BY MAX(f.id) DESC) AS rn"
+                " FROM facts f JOIN fact_sources fs ON fs.fact_id = f.id JOIN sources s ON s.id = fs.source_id"
+                f" WHERE f.key IN ({placeholders}) AND s.url IS NOT NULL AND s.url != ''"
+                " GROUP BY f.key, s.url"
+                ") WHERE rn <= ? ORDER BY key, rn",
+                (*chunk, int(limit)),
+            )
+            for key, url in cur.fetchall():
+                result[str(key)].append(str(url))
+        return result
+
+    # Bulk ingestion
+    def _insert_many(self, sql: str, rows: Iterable[Sequence[Any]]) -> range:
+        """executemany() inside one transaction; returns the range of rowids assigned."""
+        with self.batch():
+            cur = self._conn.cursor()
+            cur.executemany(sql, rows)
+            count = max(0, int(cur.rowcount))
+            if not count:
+                return range(0)
+            last = int(self._conn.execute("SELECT last_insert_rowid()").fetchone()[0])
+        return range(last - count + 1, last + 1)
+
+    @_writes
+    def add_facts_many(self, rows: Iterable[Sequence[Any]]) -> range:
+        """Insert many facts in a single transaction; returns the range of new fact ids.
+
+        rows: (key, value) or (key, value, source_id) tuples; generators are streamed, not materialised.
+        Rows whose (key, value) is already stored are skipped, so the range covers only new facts.
+        """
+        seen: set[bytes] = set()
+
+        def normalized() -> Iterator[tuple[Any, ...]]:
+            for r in rows:
+                digest = _content_hash(r[0], r[1])
+                if digest not in seen:
+                    seen.add(digest)
+                    yield (r[0], r[1], r[2] if len(r) > 2 else None, digest, digest)
+
+        with self.batch():
+            # Skipped rows must not consume ids, or the returned range would have holes
+            ids = self._insert_many(
+                "INSERT INTO facts(key, value, source_id, content_hash) SELECT ?, ?, ?, ? "
+                "WHERE NOT EXISTS (SELECT 1 FROM facts WHERE content_hash = ?)",
+                normalized(),
+            )
+            if ids:
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO fact_sources(fact_id, source_id) "
+                    "SELECT id, source_id FROM facts WHERE id BETWEEN ? AND ? AND source_id IS NOT NULL",
+                    (ids.start, ids.stop - 1),
+                )
+        # Keys touched by a bulk import aren't tracked; drop all cached lookups instead
+        self._after_commit(self._cache.clear)
+        return ids
+
+    @_writes
+    def log_events_many(self, rows: Iterable[Tuple[str, str]]) -> range:
+        """Insert many (type, content) events in a single transaction; returns the range of new event ids."""
+        return self._insert_many("INSERT INTO events(type, content) VALUES (?, ?)", rows)
+
+    @_writes
+    def add_relations_many(self, rows: Iterable[Sequence[Any]]) -> int:
+        """Insert many (subj, pred, obj[, source_id]) triples, skipping existing ones; returns rows inserted."""
+        normalized = ((r[0], r[1], r[2], r[3] if len(r) > 3 else None) for r in rows)
+        with self.batch():
+            cur = self._conn.cursor()
+            cur.executemany(
+                "INSERT OR IGNORE INTO relations(subj, pred, obj, source_id) VALUES (?, ?, ?, ?)",
+                normalized,
+            )
+            return max(0, int(cur.rowcount))
+
     # Semantic vectors
-    def upsert_fact_vector(self, fact_id: int, vector: Dict[str, float]) -> None:
-        import json as _json
+    @_writes
+    def upsert_fact_vector(self, fact_id: int, vector: Dict[str, float] | Sequence[float]) -> None:
+        """Store a fact's embedding; sparse feature dicts are hashed to the dense width first."""
+        from .indexing import hash_vector, pack_vector
+        dense = hash_vector(vector, self._vector_dim) if isinstance(vector, dict) else vector
+        if len(dense) != self._vector_dim:
+            raise ValueError(f"vector has dim {len(dense)}, expected {self._vector_dim}")
         cur = self._conn.cursor()
         cur.execute(
-            "INSERT INTO fact_vectors(fact_id, vector_json) VALUES (?, ?) "
-            "ON CONFLICT(fact_id) DO UPDATE SET vector_json=excluded.vector_json",
-            (fact_id, _json.dumps(vector)),
+            "INSERT INTO fact_vectors(fact_id, dim, vector) VALUES (?, ?, ?) "
+            "ON CONFLICT(fact_id) DO UPDATE SET dim=excluded.dim, vector=excluded.vector",
+            (fact_id, self._vector_dim, pack_vector(dense)),
         )
-        self._conn.commit()
+        self._commit()
+        feats = vector if isinstance(vector, dict) else None
+        self._after_commit(lambda: self._update_resident([(fact_id, dense)], feats))
 
-    def get_fact_vector(self, fact_id: int) -> Optional[Dict[str, float]]:
-        import json as _json
+    @_writes
+    def upsert_fact_vectors_many(self, rows: Iterable[Tuple[int, Sequence[float]]]) -> int:
+        """Store many dense (fact_id, vector) pairs in one transaction; returns the number stored."""
+        from .indexing import pack_vector
+        dim = self._vector_dim
+        items = [(int(fid), vec) for fid, vec in rows]
+        for _fid, vec in items:
+            if len(vec) != dim:
+                raise ValueError(f"vector has dim {len(vec)}, expected {dim}")
+        with self.batch():
+            self._conn.executemany(
+                "INSERT INTO fact_vectors(fact_id, dim, vector) VALUES (?, ?, ?) "
+                "ON CONFLICT(fact_id) DO UPDATE SET dim=excluded.dim, vector=excluded.vector",
+                ((fid, dim, pack_vector(vec)) for fid, vec in items),
+            )
+            self._after_commit(lambda: self._update_resident(items))
+        return len(items)
+
+    def _update_resident(
+        self, items: Sequence[Tuple[int, Sequence[float]]], feats: Optional[Dict[str, float]] = None
+    ) -> None:
+        # Facts past the watermark are picked up from the table on the next _vector_index() call
+        with self._index_lock:
+            if self._vindex is None:
+                return
+            for fid, vec in items:
+                if fid <= self._vindex.watermark:
+                    self._vindex.upsert(fid, vec)
+                    if feats is not None and self._tindex is not None:
+                        self._tindex.add_vector(fid, feats)
+
+    def get_fact_vector(self, fact_id: int) -> Optional[array]:
+        """Return the stored dense (float32) vector for a fact, or None."""
+        from .indexing import unpack_vector
         cur = self._conn.cursor()
-        cur.execute("SELECT vector_json FROM fact_vectors WHERE fact_id = ?", (fact_id,))
+        cur.execute("SELECT dim, vector FROM fact_vectors WHERE fact_id = ?", (fact_id,))
         row = cur.fetchone()
-        return (_json.loads(row[0]) if row and row[0] else None)
+        return unpack_vector(row[1]) if row and row[1] and int(row[0]) == self._vector_dim else None
+
+    def _vector_index(
+        self, conn: Optional[sqlite3.Connection] = None, unsaved: Optional[list[tuple[bytes, str]]] = None
+    ) -> VectorIndex:
+        """Return the resident vector index, loading facts newer than its watermark.
+
+        The first call loads every fact in one query; later calls only read facts added since
+        (by this LTM or another process). Stored vectors of the configured width are used as
+        is. The term index used for candidate pruning starts from the facts.terms snapshot of
+        a persistent DB, so only facts without a stored vector or newer than the snapshot are
+        embedded. New embedding_cache rows go to unsaved (see embed_many).
+        """
+        from .indexing import hash_vector, unpack_vector
+        dim = self._vector_dim
+        conn = conn or self._conn
+        if self._vindex is None or self._tindex is None:
+            self._vindex = VectorIndex(dim)
+            self._tindex = self._load_terms(conn)
+        index, terms = self._vindex, self._tindex
+        covered = terms.watermark
+        cur = conn.cursor()
+        cur.execute(
+            "SELECT f.id, f.value, v.dim, v.vector FROM facts f "
+            "LEFT JOIN fact_vectors v ON v.fact_id = f.id WHERE f.id > ? ORDER BY f.id",
+            (index.watermark,),
+        )
+        added = 0
+        while True:
+            rows = cur.fetchmany(1000)
+            if not rows:
+                break
+            stored = [unpack_vector(blob) if blob is not None and vdim == dim else None for _f, _v, vdim, blob in rows]
+            need = [vec is None or int(fid) > covered for (fid, _v, _d, _b), vec in zip(rows, stored)]
+            feats = iter(self.embed_many((str(r[1]) for r, n in zip(rows, need) if n), unsaved=unsaved))
+            for (fid, _value, _vdim, _blob), vec, embed in zip(rows, stored, need):
+                fid = int(fid)
+                f = next(feats) if embed else None
+                if vec is None:
+                    assert f is not None  # rows without a stored vector are always embedded
+                    vec = hash_vector(f, dim)
+                index.upsert(fid, vec)
+                if fid > covered and f is not None:
+                    terms.add_vector(fid, f)
+                    added += 1
+                index.watermark = fid
+        terms.watermark = max(covered, index.watermark)
+        if added >= _TERMS_SAVE_ROWS:
+            self._save_terms(conn)
+        return index
+
+    def _terms_path(self) -> Optional[Path]:
+        return self._config.db_path.with_name("facts.terms") if self._db_file is not None else None
+
+    def _load_terms(self, conn: sqlite3.Connection) -> InvertedIndex:
+        """Term index from the facts.terms snapshot, minus facts no longer in the table."""
+        path = self._terms_path()
+        terms = InvertedIndex.load(path) if path is not None else None
+        if terms is None:
+            return InvertedIndex()
+        top = int(conn.execute("SELECT COALESCE(MAX(id), 0) FROM facts").fetchone()[0])
+        if terms.watermark > top:
+            return InvertedIndex()  # DB replaced or reset since the snapshot
+        live = {int(r[0]) for r in conn.execute("SELECT id FROM facts WHERE id <= ?", (terms.watermark,))}
+        for fid in terms.doc_ids() - live:
+            terms.remove_vector(fid)
+        self._terms_saved = terms.watermark
+        return terms
+
+    def _save_terms(self, conn: sqlite3.Connection) -> None:
+        # Only committed facts may go into the snapshot (rolled-back ids get reused)
+        path = self._terms_path()
+        terms = self._tindex
+        if path is None or terms is None or terms.watermark <= self._terms_saved:
+            return
+        if conn is self._main and self._main.in_transaction:
+            return
+        try:
+            terms.save(path)
+        except OSError as exc:
+            logger.warning("could not save %s: %s", path.name, exc)
+            return
+        self._terms_saved = terms.watermark
+
+    def embed_many(
+        self, texts: Iterable[str], *, unsaved: Optional[list[tuple[bytes, str]]] = None
+    ) -> list[Dict[str, float]]:
+        """embed_text for a batch of texts, going through the process-wide embedding cache.
+
+        With memory_embed_cache_persist, texts missing from the process cache are looked up in
+        the embedding_cache table and new embeddings are stored there, so they survive restarts.
+        Callers holding _index_lock pass unsaved to collect the new rows instead, and store them
+        with _store_embeddings() after releasing it (storing may wait on the writer thread).
+        """
+        from . import indexing
+        texts = list(texts)
+        if not self.settings.memory_embed_cache_persist:
+            return indexing.embed_many(texts)
+        out: list[Optional[Dict[str, float]]] = [indexing.cached_embedding(t) for t in texts]
+        missing = {indexing.text_hash(t): t for t, feats in zip(texts, out) if feats is None}
+        found: Dict[bytes, Dict[str, float]] = {}
+        hashes = list(missing)
+        cur = self._conn.cursor()
+        for i in range(0, len(hashes), 500):
+            chunk = hashes[i : i + 500]
+            cur.execute(
+                f"SELECT hash, features FROM embedding_cache WHERE hash IN ({','.join('?' for _ in chunk)})",
+                tuple(chunk),
+            )
+            for digest, features in cur.fetchall():
+                feats = json.loads(features)
+                found[bytes(digest)] = feats
+                indexing.remember_embedding(missing[bytes(digest)], feats)
+        new: list[tuple[bytes, str]] = []
+        for digest, text in missing.items():
+            if digest not in found:
+                found[digest] = indexing.embed_text(text)
+                new.append((digest, json.dumps(found[digest], separators=(",", ":"))))
+        if unsaved is not None:
+            unsaved.extend(new)
+        elif new:
+            self._store_embeddings(new)
+        return [feats if feats is not None else dict(found[indexing.text_hash(t)]) for t, feats in zip(texts, out)]
+
+    @_writes
+    def _store_embeddings(self, rows: list[tuple[bytes, str]]) -> None:
+        self._conn.executemany("INSERT OR IGNORE INTO embedding_cache(hash, features) VALUES (?, ?)", rows)
+        self._commit()
 
     def query_semantic(self, text: str, *, top_k: int = 3) -> list[tuple[int, str, str, Optional[int], str, float]]:
         """Return top_k facts most similar to the query text using local tiny embeddings.
 
+        Candidates come from the term index (facts sharing tokens/trigrams with the query);
+        only those are scored exactly against their dense vectors.
         Returns tuples of (id, key, value, source_id, created_at, score) sorted by score desc.
         """
-        from .indexing import embed_text, cosine_similarity
-        qv = embed_text(text)
+        from .indexing import embed_text, hash_vector
+        qfeats = embed_text(text)
+        # Open this thread's reader before _index_lock (see _after_commit for the lock order)
+        conn = self._conn
+        unsaved: list[tuple[bytes, str]] = []
+        with self._index_lock:
+            index = self._vector_index(conn, unsaved)
+            assert self._tindex is not None
+            candidates = self._tindex.candidates(qfeats, top_k)
+            hits = index.top_k(hash_vector(qfeats, self._vector_dim), top_k, candidates=candidates)
+        if unsaved:
+            self._store_embeddings(unsaved)
+        if not hits:
+            return []
+        cur = conn.cursor()
+        placeholders = ",".join("?" for _ in hits)
+        cur.execute(
+            f"SELECT id, key, value, source_id, created_at FROM facts WHERE id IN ({placeholders})",
+            tuple(fid for fid, _ in hits),
+        )
+        rows = {int(r[0]): r for r in cur.fetchall()}
+        return [(*rows[fid], float(score)) for fid, score in hits if fid in rows]
+
+    # Full-text search (FTS5, BM25)
+    def _has_table(self, name: str) -> bool:
         cur = self._conn.cursor()
-        cur.execute("SELECT id, key, value, source_id, created_at FROM facts ORDER BY id DESC")
-        rows = list(cur.fetchall())
+        cur.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (name,))
+        return cur.fetchone() is not None
+
+    def search_text(
+        self, query: str, top_k: int = 10, *, kind: str = "facts"
+    ) -> list[tuple[int, str, str, str, float]]:
+        """Keyword search over fact values (kind="facts") or event contents (kind="events").
+
+        Any query token may match; results are ranked by BM25. Returns tuples of
+        (id, key-or-type, text, snippet, score) with matches in the snippet wrapped in [ ].
+        """
+        from .indexing import tokenize
+        specs = {"facts": ("facts", "key", "value"), "events": ("events", "type", "content")}
+        if kind not in specs:
+            raise ValueError(f"kind must be one of {sorted(specs)}")
+        table, label, text = specs[kind]
+        tokens = tokenize(query)
+        if not tokens or top_k <= 0:
+            return []
+        cur = self._conn.cursor()
+        fts = f"{table}_fts"
+        if self._has_table(fts):
+            # Only the text column: the label column would match every fact in a namespace by key
+            terms = " OR ".join(f'"{t}"' for t in tokens)
+            match = f"{text} : ({terms})"
+            cur.execute(
+                f"SELECT t.id, t.{label}, t.{text}, snippet({fts}, 1, '[', ']', '...', 12), bm25({fts}) "
+                f"FROM {fts} JOIN {table} t ON t.id = {fts}.rowid "
+                f"WHERE {fts} MATCH ? ORDER BY bm25({fts}) LIMIT ?",
+                (match, int(top_k)),
+            )
+            return [(int(r[0]), str(r[1]), str(r[2]), str(r[3]), -float(r[4])) for r in cur.fetchall()]
+        # No FTS5 in this SQLite build: unranked substring scan
+        like = " OR ".join(f"{text} LIKE ?" for _ in tokens)
+        cur.execute(
+            f"SELECT id, {label}, {text} FROM {table} WHERE {like} ORDER BY id DESC LIMIT ?",
+            (*[f"%{t}%" for t in tokens], int(top_k)),
+        )
+        return [(int(r[0]), str(r[1]), str(r[2]), str(r[2])[:80], 0.0) for r in cur.fetchall()]
+
+    # Approximate lookup (MinHash LSH side tables)
+    @_writes
+    def index_minhash(self) -> int:
+        """Compute LSH signatures for facts that don't have one yet; returns facts indexed.
+
+        Signatures are rebuilt from scratch if the bands/rows settings changed since last run.
+        Consolidation does this itself when memory_lsh_index is on (see memory.pipeline).
+        """
+        hasher = self._minhasher
+        with self.batch():
+            if self.get_pref(LSH_PARAMS_PREF) != hasher.params:
+                self.reset_minhash()
+                self.set_pref(LSH_PARAMS_PREF, hasher.params)
+            cur = self._conn.execute(
+                "SELECT f.id, f.value FROM facts f LEFT JOIN fact_minhash m ON m.fact_id = f.id "
+                "WHERE m.fact_id IS NULL ORDER BY f.id"
+            )
+            count = 0
+            while True:
+                rows = cur.fetchmany(500)
+                if not rows:
+                    break
+                count += self.add_minhash_many((fid, hasher.signature(str(value))) for fid, value in rows)
+        return count
+
+    @_writes
+    def reset_minhash(self) -> None:
+        """Drop every LSH signature and bucket (they are only comparable under one bands/rows setting)."""
+        with self.batch():
+            self._conn.execute("DELETE FROM fact_minhash")
+            self._conn.execute("DELETE FROM lsh_buckets")
+
+    @_writes
+    def add_minhash_many(self, rows: Iterable[Tuple[int, array]]) -> int:
+        """Store (fact_id, signature) pairs made by this LTM's MinHasher, with their LSH buckets."""
+        hasher = self._minhasher
+        items = [(int(fid), sig) for fid, sig in rows]
+        with self.batch():
+            cur = self._conn.cursor()
+            cur.executemany(
+                "INSERT OR REPLACE INTO fact_minhash(fact_id, signature) VALUES (?, ?)",
+                ((fid, sig.tobytes()) for fid, sig in items),
+            )
+            cur.executemany(
+                "INSERT OR IGNORE INTO lsh_buckets(band, bucket, fact_id) VALUES (?, ?, ?)",
+                (
+                    (band, bucket, fid)
+                    for fid, sig in items
+                    for band, bucket in enumerate(hasher.band_buckets(sig))
+                ),
+            )
+        return len(items)
+
+    def query_approx(
+        self, text: str, *, top_k: int = 3, bands: Optional[int] = None, max_candidates: int = 256
+    ) -> list[tuple[int, str, str, Optional[int], str, float]]:
+        """Approximate top_k facts by trigram similarity using the MinHash LSH tables.
+
+        bands: probe only the first N bands (fewer = faster, lower recall); max_candidates caps
+        how many colliding facts are re-ranked. Only facts covered by index_minhash() are found.
+        Returns (id, key, value, source_id, created_at, score) where score estimates Jaccard.
+        """
+        hasher = self._minhasher
+        sig = hasher.signature(text)
+        buckets = list(enumerate(hasher.band_buckets(sig)))[: bands or hasher.bands]
+        if not buckets:
+            return []
+        cur = self._conn.cursor()
+        probe = " OR ".join("(band = ? AND bucket = ?)" for _ in buckets)
+        cur.execute(
+            f"SELECT fact_id, COUNT(*) AS hits FROM lsh_buckets WHERE {probe} "
+            "GROUP BY fact_id ORDER BY hits DESC, fact_id DESC LIMIT ?",
+            (*[v for pair in buckets for v in pair], int(max_candidates)),
+        )
+        cand_ids = [int(r[0]) for r in cur.fetchall()]
+        if not cand_ids:
+            return []
+        placeholders = ",".join("?" for _ in cand_ids)
+        cur.execute(
+            "SELECT f.id, f.key, f.value, f.source_id, f.created_at, m.signature FROM facts f "
+            f"JOIN fact_minhash m ON m.fact_id = f.id WHERE f.id IN ({placeholders})",
+            tuple(cand_ids),
+        )
         scored = []
-        for r in rows:
-            fid = int(r[0])
-            vec = self.get_fact_vector(fid)
-            # If no vector yet, embed on the fly (for fresh facts) but don't store here
-            if vec is None:
-                from .indexing import embed_text as _embed
-                vec = _embed(str(r[2]))
-            score = cosine_similarity(qv, vec)
+        for *row, blob in cur.fetchall():
+            other = array("I")
+            other.frombytes(blob)
+            score = estimate_jaccard(sig, other)
             if score > 0:
-                scored.append((*r, float(score)))
-        scored.sort(key=lambda x: x[-1], reverse=True)
+                scored.append((*row, score))
+        scored.sort(key=lambda r: (r[-1], r[0]), reverse=True)
         return scored[:top_k]
 
     # Knowledge graph relations
+    @_writes
     def add_relation(self, subj: str, pred: str, obj: str, *, source_id: Optional[int] = None) -> int | None:
         cur = self._conn.cursor()
         try:
@@ -258,7 +1603,7 @@ class LTM:
                 "INSERT OR IGNORE INTO relations(subj, pred, obj, source_id) VALUES (?, ?, ?, ?)",
                 (subj, pred, obj, source_id),
             )
-            self._conn.commit()
+            self._commit()
             # fetch id if it exists
             cur.execute("SELECT id FROM relations WHERE subj=? AND pred=? AND obj=?", (subj, pred, obj))
             row = cur.fetchone()
@@ -303,11 +1648,191 @@ class LTM:
         cur.execute("SELECT subj, pred FROM relations WHERE obj = ? ORDER BY id DESC", (obj,))
         return [(str(r[0]), str(r[1])) for r in cur.fetchall()]
 
+    def _walk_sql(self, direction: str, preds: Optional[Iterable[str]], *, with_path: bool) -> tuple[str, list[object]]:
+        """Recursive CTE walk(node, depth[, path, preds]) over relations, seeded with (?, 0).
+
+        Paths are char(31)-delimited node lists used to skip nodes already on the path (cycles).
+        """
+        if direction not in ("out", "in"):
+            raise ValueError("direction must be 'out' or 'in'")
+        src, dst = ("subj", "obj") if direction == "out" else ("obj", "subj")
+        params: list[object] = []
+        pred_filter = ""
+        if preds is not None:
+            plist = list(preds)
+            pred_filter = f" AND r.pred IN ({','.join('?' for _ in plist)})" if plist else " AND 0"
+            params.extend(plist)
+        if with_path:
+            sql = (
+                "WITH RECURSIVE walk(node, depth, path, preds) AS ("
+                " SELECT ?, 0, char(31) || ? || char(31), ''"
+                " UNION ALL"
+                f" SELECT r.{dst}, w.depth + 1, w.path || r.{dst} || char(31), w.preds || r.pred || char(31)"
+                f" FROM walk w JOIN relations r ON r.{src} = w.node{pred_filter}"
+                f" WHERE w.depth < ? AND instr(w.path, char(31) || r.{dst} || char(31)) = 0"
+                " ORDER BY 2)"
+            )
+        else:
+            # UNION drops repeated (node, depth) rows; the depth bound ends cycles
+            sql = (
+                "WITH RECURSIVE walk(node, depth) AS ("
+                " SELECT ?, 0"
+                " UNION"
+                f" SELECT r.{dst}, w.depth + 1 FROM walk w JOIN relations r ON r.{src} = w.node{pred_filter}"
+                " WHERE w.depth < ?)"
+            )
+        return sql, params
+
+    @staticmethod
+    def _split_path(text: str) -> list[str]:
+        return [p for p in str(text).split("\x1f") if p]
+
+    def traverse(
+        self,
+        start: str,
+        max_depth: int = 3,
+        preds: Optional[Iterable[str]] = None,
+        *,
+        direction: str = "out",
+    ) -> list[tuple[str, int, list[str]]]:
+        """Nodes reachable from start within max_depth hops, in one query.
+
+        Follows edges subj -> obj (direction="out") or obj -> subj ("in"), optionally only
+        with the given predicates. Returns (node, depth, path) for each node at its shortest
+        depth, where path is the node list from start; ordered by depth then node.
+        """
+        body, params = self._walk_sql(direction, preds, with_path=True)
+        sql = body + " SELECT node, MIN(depth), path FROM walk WHERE depth > 0 GROUP BY node ORDER BY 2, 1"
+        cur = self._conn.cursor()
+        cur.execute(sql, (start, start, *params, int(max_depth)))
+        return [(str(node), int(depth), self._split_path(path)) for node, depth, path in cur.fetchall()]
+
+    def shortest_path(
+        self,
+        a: str,
+        b: str,
+        *,
+        max_depth: int = 4,
+        preds: Optional[Iterable[str]] = None,
+        direction: str = "out",
+    ) -> Optional[list[tuple[str, str, str]]]:
+        """Fewest-hop path from a to b as (subj, pred, obj) edges; [] if a == b, None if unreachable."""
+        if a == b:
+            return []
+        body, params = self._walk_sql(direction, preds, with_path=True)
+        sql = body + " SELECT path, preds FROM walk WHERE node = ? ORDER BY depth LIMIT 1"
+        cur = self._conn.cursor()
+        cur.execute(sql, (a, a, *params, int(max_depth), b))
+        row = cur.fetchone()
+        if row is None:
+            return None
+        nodes, hops = self._split_path(row[0]), self._split_path(row[1])
+        edges = list(zip(nodes, hops, nodes[1:]))
+        return edges if direction == "out" else [(o, p, s) for s, p, o in edges]
+
+    def reachable(
+        self,
+        start: str,
+        max_depth: int = 4,
+        preds: Optional[Iterable[str]] = None,
+        *,
+        direction: str = "out",
+    ) -> set[str]:
+        """Set of nodes reachable from start within max_depth hops (start itself excluded)."""
+        body, params = self._walk_sql(direction, preds, with_path=False)
+        cur = self._conn.cursor()
+        cur.execute(body + " SELECT DISTINCT node FROM walk WHERE node <> ?", (start, *params, int(max_depth), start))
+        return {str(r[0]) for r in cur.fetchall()}
+
+    def stats(self) -> Dict[str, Any]:
+        """Row counts from the trigger-maintained stats table (one small query, independent of history).
+
+        Returns {"facts": n, "events": n, "event_types": {...}, "fact_namespaces": {...},
+        "facts_per_day": {...}, "events_per_day": {...}}; the fact namespace is the key up to
+        its first ':'. Counts cover the hot tables (archived events are in event_rollups).
+        """
+        return read_stats(self._conn)
+
+    def cache_stats(self) -> Dict[str, int]:
+        """Hit/miss/eviction counters and current size of the LTM lookup cache."""
+        return self._cache.stats()
+
+    def backup(
+        self,
+        dest: Optional[Path | str] = None,
+        *,
+        pages_per_step: int = 256,
+        compress: bool = False,
+        checksum: bool = True,
+        progress: Optional[Callable[[int, int, int], object]] = None,
+    ) -> Optional[Path]:
+        """Online copy of the memory DB using SQLite's incremental backup API.
+
+        Copies pages_per_step pages at a time and releases the source between steps, so
+        readers and writers are not blocked. dest defaults to
+        <data_dir>/backups/memory-<UTC timestamp>.db. compress gzips the copy (adding .gz);
+        checksum writes a sha256sum-style <file>.sha256 sidecar. Returns the written path,
+        or None if permission to write it is denied.
+        """
+        if dest is None:
+            stamp = datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S")
+            dest = self.settings.data_dir / "backups" / f"memory-{stamp}.db"
+        target = Path(dest)
+        if compress and target.suffix != ".gz":
+            target = target.with_name(target.name + ".gz")
+        decision = request_permission(action="write memory backup", resource=str(target), path=target)
+        if decision is not Decision.APPROVED:
+            return None
+        target.parent.mkdir(parents=True, exist_ok=True)
+        self.flush()
+        part = target.with_name(target.name + ".part")
+        part.unlink(missing_ok=True)
+        copy = sqlite3.connect(str(part))
+        try:
+            self._conn.backup(copy, pages=max(1, int(pages_per_step)), progress=progress)
+        finally:
+            copy.close()
+        if compress:
+            packed = target.with_name(target.name + ".tmp")
+            with open(part, "rb") as src, gzip.open(packed, "wb") as out:
+                shutil.copyfileobj(src, out)
+            part.unlink()
+            part = packed
+        os.replace(part, target)
+        if checksum:
+            digest = hashlib.sha256()
+            with open(target, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(chunk)
+            target.with_name(target.name + ".sha256").write_text(f"{digest.hexdigest()}  {target.name}\n")
+        return target
+
     def is_persistent(self) -> bool:
         return self._config.persistent
 
     def close(self) -> None:
+        writer, self._writer = self._writer, None
+        if writer is not None:
+            writer.stop()
+        with self._readers_lock:
+            readers, self._readers = self._readers, []
+        for _thread, conn in readers:
+            try:
+                conn.close()
+            except Exception:
+                pass
+        try:
+            self.flush()
+        except Exception:
+            pass
+        with self._index_lock:
+            self._save_terms(self._main)
+        if self.settings.sqlite_optimize_on_close:
+            try:
+                self._main.execute("PRAGMA optimize")
+            except Exception:
+                pass
         try:
-            self._conn.close()
+            self._main.close()
         except Exception:
             pass
@@ -0,0 +1,113 @@
+"""Resident vector index used by LTM.query_semantic.
+
+Vectors are loaded from SQLite once per LTM and then kept current by the LTM
+write path, so a semantic query is a scan over in-process vectors plus a
+heap-based top-k instead of one SELECT per fact.
+
+Vectors are dense, unit-length float32 arrays (see indexing.hash_vector). When
+NumPy is installed they live in one contiguous matrix and are scored with a
+single matrix-vector product; otherwise a pure-Python dot product is used.
+"""
+from __future__ import annotations
+
+import heapq
+from array import array
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from .indexing import dot
+
+try:  # optional acceleration
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised when numpy is absent
+    np = None  # type: ignore[assignment]
+
+
+class VectorIndex:
+    def __init__(self, dim: int, *, use_numpy: bool | None = None) -> None:
+        self.dim = int(dim)
+        self.use_numpy = (np is not None) if use_numpy is None else (use_numpy and np is not None)
+        # Highest fact id loaded from the DB; newer facts (from any writer) are loaded as a delta
+        self.watermark = 0
+        self._ids: List[int] = []
+        self._rows: Dict[int, int] = {}
+        self._vecs: List[array] = []
+        self._matrix = np.zeros((0, self.dim), dtype=np.float32) if self.use_numpy else None
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, fact_id: object) -> bool:
+        return fact_id in self._rows
+
+    def _ensure_capacity(self, n: int) -> None:
+        assert self._matrix is not None
+        if n <= self._matrix.shape[0]:
+            return
+        grown = np.zeros((max(n, 2 * self._matrix.shape[0], 64), self.dim), dtype=np.float32)
+        grown[: len(self._ids)] = self._matrix[: len(self._ids)]
+        self._matrix = grown
+
+    def upsert(self, fact_id: int, vector: Sequence[float]) -> None:
+        fid = int(fact_id)
+        if len(vector) != self.dim:
+            raise ValueError(f"vector has dim {len(vector)}, index expects {self.dim}")
+        row = self._rows.get(fid)
+        if row is None:
+            row = len(self._ids)
+            if self._matrix is None:
+                self._vecs.append(array("f"))
+            else:
+                self._ensure_capacity(row + 1)
+            self._ids.append(fid)
+            self._rows[fid] = row
+        if self._matrix is None:
+            self._vecs[row] = array("f", vector)
+        else:
+            self._matrix[row] = np.asarray(vector, dtype=np.float32)
+
+    def remove(self, fact_id: int) -> None:
+        row = self._rows.pop(int(fact_id), None)
+        if row is None:
+            return
+        # Swap the last row into the hole to keep storage dense
+        last = len(self._ids) - 1
+        if row != last:
+            moved = self._ids[last]
+            self._ids[row] = moved
+            self._rows[moved] = row
+            if self._matrix is None:
+                self._vecs[row] = self._vecs[last]
+            else:
+                self._matrix[row] = self._matrix[last]
+        self._ids.pop()
+        if self._matrix is None:
+            self._vecs.pop()
+
+    def top_k(
+        self, query: Sequence[float], k: int, *, candidates: Iterable[int] | None = None
+    ) -> List[Tuple[int, float]]:
+        """Return up to k (fact_id, score) pairs with score > 0, best first (newest wins ties).
+
+        If candidates is given, only those fact ids are scored.
+        """
+        if candidates is None:
+            ids = self._ids
+            rows: List[int] | None = None
+        else:
+            rows = [r for r in (self._rows.get(int(c)) for c in candidates) if r is not None]
+            ids = [self._ids[r] for r in rows]
+        n = len(ids)
+        if k <= 0 or not n:
+            return []
+        if self._matrix is not None:
+            mat = self._matrix[: len(self._ids)] if rows is None else self._matrix[rows]
+            scores = mat @ np.asarray(query, dtype=np.float32)
+            if k < n:
+                picked = np.argpartition(scores, n - k)[n - k :]
+            else:
+                picked = np.arange(n)
+            cands = [(ids[i], float(scores[i])) for i in picked.tolist()]
+        else:
+            vecs = self._vecs if rows is None else [self._vecs[r] for r in rows]
+            cands = [(fid, dot(vec, query)) for fid, vec in zip(ids, vecs)]
+        return heapq.nlargest(k, (c for c in cands if c[1] > 0), key=lambda c: (c[1], c[0]))
@@ -41,8 +41,82 @@ class Settings(BaseModel):
     domain_allowlist: str = Field(default_factory=lambda: os.getenv("NOVA_DOMAIN_ALLOWLIST", "wiki,wikipedia,edu,gov"))
     http_rate_limit_per_min: int = Field(default_factory=lambda: int(os.getenv("NOVA_HTTP_RATE_LIMIT_PER_MIN", "30")))
 
+    # Memory (SQLite write path)
+    # commit_every > 1 or commit_interval_ms > 0 enables write-behind: writes are grouped and
+    # committed once either threshold is reached (a timer commits when the interval expires),
+    # or on flush/close.
+    memory_commit_every: int = Field(default_factory=lambda: int(os.getenv("NOVA_MEMORY_COMMIT_EVERY", "1")))
+    memory_commit_interval_ms: int = Field(
+        default_factory=lambda: int(os.getenv("NOVA_MEMORY_COMMIT_INTERVAL_MS", "0"))
+    )
+
+    # Width of the dense hashed fact embeddings stored in fact_vectors
+    memory_vector_dim: int = Field(default_factory=lambda: int(os.getenv("NOVA_MEMORY_VECTOR_DIM", "256")))
+
+    # MinHash LSH for approximate fact lookup: signature = bands x rows 32-bit MinHash values.
+    # Off by default; when on, consolidation signs new facts in its pipeline workers.
+    memory_lsh_index: bool = Field(
+        default_factory=lambda: os.getenv("NOVA_MEMORY_LSH_INDEX", "false").lower() in ("1", "true", "yes", "on")
+    )
+    memory_lsh_bands: int = Field(default_factory=lambda: int(os.getenv("NOVA_MEMORY_LSH_BANDS", "16")))
+    memory_lsh_rows: int = Field(default_factory=lambda: int(os.getenv("NOVA_MEMORY_LSH_ROWS", "4")))
+
+    # Events older than this many days are rolled up and archived by the nightly job (0 = keep all)
+    memory_event_retention_days: int = Field(
+        default_factory=lambda: int(os.getenv("NOVA_MEMORY_EVENT_RETENTION_DAYS", "90"))
+    )
+
+    # Read-through LRU for fact-key lookups, citations and prefs (entries=0 disables; ttl 0 = no expiry)
+    memory_cache_entries: int = Field(default_factory=lambda: int(os.getenv("NOVA_MEMORY_CACHE_ENTRIES", "1024")))
+    memory_cache_bytes: int = Field(
+        default_factory=lambda: int(os.getenv("NOVA_MEMORY_CACHE_BYTES", str(4 * 1024 * 1024)))
+    )
+    memory_cache_ttl_s: float = Field(default_factory=lambda: float(os.getenv("NOVA_MEMORY_CACHE_TTL_S", "300")))
+    # Share one LTM across threads: per-thread readers, writes group-committed by a writer thread
+    memory_threadsafe: bool = Field(
+        default_factory=lambda: os.getenv("NOVA_MEMORY_THREADSAFE", "false").lower() in ("1", "true", "yes", "on")
+    )
+    # Thread pool size for memory.async_store.AsyncLTM
+    memory_async_workers: int = Field(default_factory=lambda: int(os.getenv("NOVA_MEMORY_ASYNC_WORKERS", "4")))
+    # Process-wide embed_text memo (entries=0 disables); persist=true also keeps embeddings in memory.db
+    memory_embed_cache_entries: int = Field(
+        default_factory=lambda: int(os.getenv("NOVA_MEMORY_EMBED_CACHE_ENTRIES", "4096"))
+    )
+    memory_embed_cache_bytes: int = Field(
+        default_factory=lambda: int(os.getenv("NOVA_MEMORY_EMBED_CACHE_BYTES", str(16 * 1024 * 1024)))
+    )
+    memory_embed_cache_persist: bool = Field(
+        default_factory=lambda: os.getenv("NOVA_MEMORY_EMBED_CACHE_PERSIST", "false").lower()
+        in ("1", "true", "yes", "on")
+    )
+    # Worker processes for large consolidation passes (0 = one per CPU core)
+    memory_pipeline_workers: int = Field(
+        default_factory=lambda: int(os.getenv("NOVA_MEMORY_PIPELINE_WORKERS", "0"))
+    )
+    # Nightly job writes a compressed, checksummed backup to <data_dir>/backups and keeps the newest N
+    memory_backup_nightly: bool = Field(
+        default_factory=lambda: os.getenv("NOVA_MEMORY_BACKUP_NIGHTLY", "false").lower() in ("1", "true", "yes", "on")
+    )
+    memory_backup_keep: int = Field(default_factory=lambda: int(os.getenv("NOVA_MEMORY_BACKUP_KEEP", "7")))
+
+    # SQLite pragma profile applied to every LTM connection
+    sqlite_journal_mode: str = Field(default_factory=lambda: os.getenv("NOVA_SQLITE_JOURNAL_MODE", "wal"))
+    sqlite_synchronous: str = Field(default_factory=lambda: os.getenv("NOVA_SQLITE_SYNCHRONOUS", "normal"))
+    sqlite_busy_timeout_ms: int = Field(default_factory=lambda: int(os.getenv("NOVA_SQLITE_BUSY_TIMEOUT_MS", "5000")))
+    sqlite_mmap_size: int = Field(
+        default_factory=lambda: int(os.getenv("NOVA_SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+    )
+    # Negative values are KiB (SQLite convention); -16000 is roughly 16 MB of page cache
+    sqlite_cache_size: int = Field(default_factory=lambda: int(os.getenv("NOVA_SQLITE_CACHE_SIZE", "-16000")))
+    sqlite_temp_store: str = Field(default_factory=lambda: os.getenv("NOVA_SQLITE_TEMP_STORE", "memory"))
+    sqlite_optimize_on_close: bool = Field(
+        default_factory=lambda: os.getenv("NOVA_SQLITE_OPTIMIZE_ON_CLOSE", "true").lower() in ("1", "true", "yes", "on")
+    )
+
     # CLI
-    cli_color: bool = Field(default_factory=lambda: os.getenv("NOVA_CLI_COLOR", "true").lower() in ("1", "true", "yes", "on"))
+    cli_color: bool = Field(
+        default_factory=lambda: os.getenv("NOVA_CLI_COLOR", "true").lower() in ("1", "true", "yes", "on")
+    )
 
     # Pydantic v2 style config
     model_config = ConfigDict(arbitrary_types_allowed=True)
@@ -9,6 +9,7 @@ import time
 from memory.store import LTM
 from internet.search import aggregate_sources
 from memory.consolidator import consolidate
+from memory.retention import compact_events
 
 
 def _log_job_event(ltm: LTM, name: str, status: str, started: float, meta: str = "") -> None:
@@ -34,7 +35,7 @@ def _extract_question_from_chat(content: str) -> str | None:
 
 def find_gaps(ltm: LTM, limit: int = 5) -> List[str]:
     gaps: List[str] = []
-    for _id, typ, content, _ts in ltm.get_events("chat"):
+    for _id, typ, content, _ts in ltm.iter_events("chat"):
         if "don't know" in content.lower():
             q = _extract_question_from_chat(content)
             if q:
@@ -72,17 +73,44 @@ def run_gap_research(ltm: LTM, max_items: int = 3) -> int:
         _log_job_event(ltm, "research", status, started, meta=f"count:{count}")
 
 
-def run_nightly(ltm: LTM | None = None) -> None:
+def _nightly_backup(store: LTM) -> str:
+    """Write a compressed backup and prune old ones; returns the backup file name ("" if skipped)."""
+    settings = store.settings
+    if not settings.memory_backup_nightly or not store.is_persistent():
+        return ""
+    path = store.backup(compress=True)
+    if path is None:
+        return ""
+    keep = max(1, int(settings.memory_backup_keep))
+    backups = sorted(path.parent.glob("memory-*.db.gz"), reverse=True)
+    for old in backups[keep:]:
+        for f in (old, old.with_name(old.name + ".sha256")):
+            try:
+                f.unlink()
+            except OSError:
+                pass
+    return path.name
+
+
+def run_nightly(ltm: LTM | None = None, *, full: bool = False) -> None:
+    """Consolidate new facts (all facts with full=True), archive old events, optionally back up."""
     store = ltm or LTM()
     started = time.time()
     status = "ok"
+    archived = 0
+    backup = ""
     try:
-        consolidate(store)
+        consolidate(store, full=full)
+        # Keep the hot events table small: roll up and archive events past retention
+        archived = compact_events(store)["events"]
+        backup = _nightly_backup(store)
     except Exception:
         status = "fail"
         raise
     finally:
-        _log_job_event(store, "nightly", status, started)
+        tags = (f"archived:{archived}" if archived else "", f"backup:{backup}" if backup else "")
+        meta = " ".join(m for m in tags if m)
+        _log_job_event(store, "nightly", status, started, meta=meta)
 
 
 def run_daily_summary(ltm: LTM | None = None) -> str:
@@ -91,30 +119,35 @@ def run_daily_summary(ltm: LTM | None = None) -> str:
     Returns the digest text.
     """
     store = ltm or LTM()
-    # Collect items
-    inbox = store.get_events("inbox")[:50]
-    learning = store.get_events("learning")[:50]
-    chats = store.get_events("chat")[:50]
+    # Collect counts (capped at 50 per type, as the digest always has)
+    by_type = store.stats()["event_types"]
+    inbox, learning, chats = (min(by_type.get(t, 0), 50) for t in ("inbox", "learning", "chat"))
     # Compose a short digest
     parts: List[str] = []
     if inbox:
-        parts.append(f"inbox={len(inbox)}")
+        parts.append(f"inbox={inbox}")
     if learning:
-        parts.append(f"learned={len(learning)}")
+        parts.append(f"learned={learning}")
     if chats:
-        parts.append(f"chats={len(chats)}")
+        parts.append(f"chats={chats}")
     if not parts:
         parts.append("idle")
     header = ", ".join(parts)
     # Pull citation URLs from learned facts if any
     cite_urls: List[str] = []
     try:
-        for _id, _k, v, _sid, _ts in store.get_facts():
-            if _k.startswith("learned:"):
-                # fetch cites via helper using the learned key
-                cite_urls.extend(store.get_citation_urls_for_key(_k))
+        page_size = 20
+        before_id = None
+        while len(cite_urls) < 5:
+            # Newest learned facts first; one round trip per page, stopping once 5 URLs are found
+            page = store.get_facts(limit=page_size, before_id=before_id, prefix="learned:")
+            for urls in store.get_citation_urls_for_keys(k for _id, k, _v, _sid, _ts in page).values():
+                cite_urls.extend(u for u in urls if u not in cite_urls)
                 if len(cite_urls) >= 5:
                     break
+            if len(page) < page_size:
+                break
+            before_id = page[-1][0]
     except Exception:
         pass
     digest = f"Daily digest: {header}"
@@ -154,7 +187,7 @@ def run_health_checks(ltm: LTM | None = None) -> int:
     # Memory CRUD smoke
     sid = store.add_source("https://example.org/health", "Health")
     fid = store.add_fact("health:check", "ok", source_id=sid)
-    if any(r[0] == fid for r in store.get_facts("health:check")):
+    if any(r[0] == fid for r in store.get_facts("health:check", limit=1)):
         passed += 1
     # Policy check for data dir vs outside
     from security import policies
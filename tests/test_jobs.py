@@ -48,6 +48,37 @@ def test_inbox_and_daily_summary(monkeypatch) -> None:
     key = f"summary:{datetime.utcnow().strftime('%Y-%m-%d')}"
     assert ltm.get_facts(key)
 
+def test_daily_summary_stops_after_five_citations(monkeypatch) -> None:
+    monkeypatch.setenv("NOVA_NONINTERACTIVE", "1")
+    monkeypatch.setenv("NOVA_PERMISSION_DEFAULT", "deny")
+    ltm = LTM()
+    for i in range(200):
+        ltm.add_fact_with_sources(f"learned:topic{i:03d}", f"fact {i}", [(f"https://example.org/{i}", "t")])
+    pages: list = []
+    real = ltm.get_facts
+    monkeypatch.setattr(ltm, "get_facts", lambda *a, **k: pages.append(k) or real(*a, **k))
+    run_daily_summary(ltm)
+    assert len(pages) == 1  # did not walk the whole learned: namespace
+    from datetime import datetime
+    key = f"summary:{datetime.utcnow().strftime('%Y-%m-%d')}"
+    assert len(ltm.get_citation_urls_for_key(key, limit=10)) == 5
+
+
+def test_daily_summary_cites_newest_learned_facts(monkeypatch) -> None:
+    monkeypatch.setenv("NOVA_NONINTERACTIVE", "1")
+    monkeypatch.setenv("NOVA_PERMISSION_DEFAULT", "deny")
+    ltm = LTM()
+    for i in range(8):
+        ltm.add_fact_with_sources(f"learned:a-{i}", "old", [(f"https://old/{i}", "t")])
+    for i in range(3):
+        ltm.add_fact_with_sources(f"learned:z-{i}", "new", [(f"https://new/{i}", "t")])
+    run_daily_summary(ltm)
+    from datetime import datetime
+    key = f"summary:{datetime.utcnow().strftime('%Y-%m-%d')}"
+    urls = ltm.get_citation_urls_for_key(key, limit=10)
+    assert sorted(urls) == ["https://new/0", "https://new/1", "https://new/2", "https://old/6", "https://old/7"]
+
+
 def test_jobs_status_events(monkeypatch) -> None:
     monkeypatch.setenv("NOVA_NONINTERACTIVE", "1")
     monkeypatch.setenv("NOVA_PERMISSION_DEFAULT", "deny")
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import pytest
+
 from memory.store import STM, LTM
 from memory.consolidator import consolidate
 from memory.indexing import embed_text, cosine_similarity
@@ -90,3 +92,996 @@ def test_consolidation_extracts_relations(monkeypatch) -> None:
     consolidate(ltm)
     rels = ltm.get_relations(subj="France", pred="capital_of", obj="Paris")
     assert rels, "Expected extracted relation from capital:france"
+
+
+def _persistent_ltm(monkeypatch, tmp_path, **overrides) -> LTM:
+    from nova.config import Settings
+
+    monkeypatch.setenv("NOVA_NONINTERACTIVE", "1")
+    monkeypatch.setenv("NOVA_PERMISSION_DEFAULT", "allow")
+    monkeypatch.setenv("NOVA_DATA_DIR", str(tmp_path))
+    ltm = LTM(Settings(**overrides))
+    assert ltm.is_persistent() is True
+    return ltm
+
+
+def _count_facts_from_other_connection(tmp_path) -> int:
+    import sqlite3
+
+    conn = sqlite3.connect(str(tmp_path / "memory.db"))
+    try:
+        return int(conn.execute("SELECT COUNT(*) FROM facts").fetchone()[0])
+    finally:
+        conn.close()
+
+
+def test_batch_commits_once_and_rolls_back_on_error(monkeypatch, tmp_path) -> None:
+    ltm = _persistent_ltm(monkeypatch, tmp_path)
+    with ltm.batch():
+        ltm.add_fact("note:a", "one")
+        ltm.add_fact("note:b", "two")
+        # Not yet visible to other connections
+        assert _count_facts_from_other_connection(tmp_path) == 0
+    assert _count_facts_from_other_connection(tmp_path) == 2
+
+    try:
+        with ltm.batch():
+            ltm.add_fact("note:c", "three")
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+    assert ltm.get_facts("note:c") == []
+    ltm.close()
+
+
+def test_write_behind_commits_on_size_threshold(monkeypatch, tmp_path) -> None:
+    ltm = _persistent_ltm(monkeypatch, tmp_path, memory_commit_every=3)
+    assert ltm.write_behind is True
+    ltm.add_fact("note:a", "one")
+    ltm.add_fact("note:b", "two")
+    assert _count_facts_from_other_connection(tmp_path) == 0
+    ltm.add_fact("note:c", "three")
+    assert _count_facts_from_other_connection(tmp_path) == 3
+    ltm.add_fact("note:d", "four")
+    ltm.close()  # close flushes the remainder
+    assert _count_facts_from_other_connection(tmp_path) == 4
+
+
+def test_write_behind_commits_when_interval_expires(monkeypatch, tmp_path) -> None:
+    import time
+
+    for every in (0, 50):
+        ltm = _persistent_ltm(monkeypatch, tmp_path, memory_commit_every=every, memory_commit_interval_ms=100)
+        before = _count_facts_from_other_connection(tmp_path)
+        ltm.add_fact("note:timer", f"every {every}")
+        assert _count_facts_from_other_connection(tmp_path) == before
+        deadline = time.monotonic() + 5
+        while _count_facts_from_other_connection(tmp_path) == before and time.monotonic() < deadline:
+            time.sleep(0.02)
+        # Committed without another write, so the SQLite write lock is free for other processes
+        assert _count_facts_from_other_connection(tmp_path) == before + 1
+        assert ltm._main.in_transaction is False
+        ltm.close()
+
+
+def test_bulk_ingestion_streams_and_returns_id_ranges(monkeypatch) -> None:
+    monkeypatch.setenv("NOVA_NONINTERACTIVE", "1")
+    monkeypatch.setenv("NOVA_PERMISSION_DEFAULT", "deny")
+    ltm = LTM()
+    ltm.add_fact("note:first", "existing")
+
+    ids = ltm.add_facts_many((f"bulk:{i}", f"value {i}") for i in range(500))
+    assert len(ids) == 500
+    assert [r[0] for r in ltm.get_facts("bulk:0")] == [ids[0]]
+    assert [r[0] for r in ltm.get_facts("bulk:499")] == [ids[-1]]
+
+    eids = ltm.log_events_many(("chat", f"turn {i}") for i in range(10))
+    assert len(eids) == 10 and len(ltm.get_events("chat")) == 10
+
+    inserted = ltm.add_relations_many([("A", "knows", "B"), ("A", "knows", "B"), ("B", "knows", "C", None)])
+    assert inserted == 2
+    assert ltm.add_facts_many([]) == range(0)
+
+
+def test_schema_indexes_serve_hot_queries(monkeypatch) -> None:
+    from memory.store import SCHEMA_VERSION
+
+    monkeypatch.setenv("NOVA_NONINTERACTIVE", "1")
+    monkeypatch.setenv("NOVA_PERMISSION_DEFAULT", "deny")
+    ltm = LTM()
+    assert ltm.schema_version() == SCHEMA_VERSION
+    # Re-running the upgrade is a no-op
+    ltm._migrate()
+    assert ltm.schema_version() == SCHEMA_VERSION
+
+    hot = {
+        "idx_facts_key": ("SELECT id, key, value, source_id, created_at FROM facts WHERE key = ? ORDER BY id DESC", ("k",)),
+        "idx_facts_source": ("SELECT id FROM facts WHERE source_id = ?", (1,)),
+        "idx_events_type": ("SELECT id, type, content, created_at FROM events WHERE type = ? ORDER BY id DESC", ("chat",)),
+    }
+    for index, (sql, params) in hot.items():
+        plan = " ".join(ltm.explain_query_plan(sql, params))
+        assert index in plan, plan
+        assert "TEMP B-TREE" not in plan, plan
+    # Relation lookups use the composite indexes; no separate single-column ones to maintain
+    edges = {
+        "sqlite_autoindex_relations": ("SELECT pred, obj FROM relations WHERE subj = ? ORDER BY id DESC", ("France",)),
+        "idx_relations_obj_pred": ("SELECT subj, pred FROM relations WHERE obj = ? ORDER BY id DESC", ("Paris",)),
+    }
+    for index, (sql, params) in edges.items():
+        assert index in " ".join(ltm.explain_query_plan(sql, params))
+    names = {r[0] for r in ltm._conn.execute("SELECT name FROM sqlite_master WHERE tbl_name = 'relations'")}
+    assert not names & {"idx_relations_subj", "idx_relations_obj"}
+
+
+def test_pragma_profile_enables_wal_and_concurrent_reads(monkeypatch, tmp_path) -> None:
+    import sqlite3
+
+    writer = _persistent_ltm(monkeypatch, tmp_path)
+    conn = writer._conn
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+    assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 5000
+    assert conn.execute("PRAGMA temp_store").fetchone()[0] == 2  # MEMORY
+
+    writer.add_fact("note:a", "committed")
+    with writer.batch():
+        writer.add_fact("note:b", "pending")
+        # A reader is not blocked by the open write transaction and sees the last commit
+        reader = sqlite3.connect(str(tmp_path / "memory.db"), timeout=0)
+        try:
+            assert reader.execute("SELECT COUNT(*) FROM facts").fetchone()[0] == 1
+        finally:
+            reader.close()
+    writer.close()
+
+
+def test_pragma_profile_is_configurable(monkeypatch, tmp_path) -> None:
+    ltm = _persistent_ltm(monkeypatch, tmp_path, sqlite_journal_mode="delete", sqlite_synchronous="bogus")
+    assert ltm._conn.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+    # Invalid values are ignored, leaving SQLite's default (FULL)
+    assert ltm._conn.execute("PRAGMA synchronous").fetchone()[0] == 2
+    ltm.close()
+
+
+def test_semantic_query_uses_resident_index(monkeypatch) -> None:
+    monkeypatch.setenv("NOVA_NONINTERACTIVE", "1")
+    monkeypatch.setenv("NOVA_PERMISSION_DEFAULT", "deny")
+    ltm = LTM()
+    ltm.add_facts_many((f"note:{i}", f"filler note number {i}") for i in range(200))
+    ltm.add_fact("note:coffee", "User likes double espresso with one sugar")
+    consolidate(ltm)
+
+    statements: list[str] = []
+    ltm._conn.set_trace_callback(statements.append)
+    top = ltm.query_semantic("double espresso", top_k=2)
+    assert "espresso" in top[0][2]
+    # Delta load + one row fetch, not one SELECT per fact
+    assert len(statements) <= 3
+
+    # Facts added later are picked up incrementally
+    ltm.add_fact("note:tea", "Green tea with jasmine")
+    statements.clear()
+    assert "tea" in ltm.query_semantic("jasmine green tea", top_k=1)[0][2]
+    assert len(statements) <= 4
+
+
+def test_term_index_snapshot_avoids_reembedding(monkeypatch, tmp_path) -> None:
+    from array import array
+
+    ltm = _persistent_ltm(monkeypatch, tmp_path)
+    ltm.add_facts_many((f"note:{i}", f"filler note number {i}") for i in range(50))
+    coffee = ltm.add_fact("note:coffee", "User likes double espresso with one sugar")
+    consolidate(ltm)  # stores dense vectors
+    expected = ltm.query_semantic("double espresso", top_k=2)
+    assert expected[0][0] == coffee
+    assert all(isinstance(a, array) for a in ltm._tindex._postings["espresso"])  # array-backed postings
+    ltm.close()
+    assert (tmp_path / "facts.terms").exists()
+
+    embedded: list[str] = []
+    real_embed_many = LTM.embed_many
+
+    def spy(self, texts, **kwargs):
+        texts = list(texts)
+        embedded.extend(texts)
+        return real_embed_many(self, texts, **kwargs)
+
+    monkeypatch.setattr(LTM, "embed_many", spy)
+    ltm = _persistent_ltm(monkeypatch, tmp_path)
+    assert ltm.query_semantic("double espresso", top_k=2) == expected
+    assert embedded == []  # cold load used stored vectors and the snapshot
+    tea = ltm.add_fact("note:tea", "Green tea with jasmine")
+    assert ltm.query_semantic("jasmine green tea", top_k=1)[0][0] == tea
+    assert embedded == ["Green tea with jasmine"]
+    # A re-learned fact moves to a new id; the snapshot's old id is dropped on load
+    ltm.add_fact("note:0", "something else")
+    moved = ltm.add_fact("note:0", "filler note number 0")
+    assert moved != 1
+    ltm.close()
+    ltm = _persistent_ltm(monkeypatch, tmp_path)
+    ltm.query_semantic("filler")
+    assert moved in ltm._tindex.doc_ids() and 1 not in ltm._tindex.doc_ids()
+    ltm.close()
+
+
+def test_json_vectors_migrate_to_binary(monkeypatch, tmp_path) -> None:
+    import json
+    import sqlite3
+
+    from memory.indexing import embed_text
+
+    # A v1 database with JSON vectors
+    conn = sqlite3.connect(str(tmp_path / "memory.db"))
+    conn.execute(
+        "CREATE TABLE facts (id INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT NOT NULL, value TEXT NOT NULL,"
+        " source_id INTEGER, created_at DATETIME DEFAULT CURRENT_TIMESTAMP)"
+    )
+    conn.execute("CREATE TABLE fact_vectors (fact_id INTEGER PRIMARY KEY, vector_json TEXT NOT NULL)")
+    conn.execute("INSERT INTO facts(key, value) VALUES ('note:coffee', 'double espresso with sugar')")
+    conn.execute("INSERT INTO fact_vectors VALUES (1, ?)", (json.dumps(embed_text("double espresso with sugar")),))
+    conn.execute("PRAGMA user_version = 1")
+    conn.commit()
+    conn.close()
+
+    ltm = _persistent_ltm(monkeypatch, tmp_path)
+    cols = [r[1] for r in ltm._conn.execute("PRAGMA table_info(fact_vectors)")]
+    assert cols == ["fact_id", "dim", "vector"]
+    vec = ltm.get_fact_vector(1)
+    assert vec is not None and len(vec) == 256
+    assert abs(sum(v * v for v in vec) - 1.0) < 1e-4
+    assert ltm.query_semantic("espresso")[0][0] == 1
+    ltm.close()
+
+
+def test_vector_index_numpy_and_python_paths_agree() -> None:
+    from memory.indexing import embed_dense
+    from memory.vectors import VectorIndex, np
+
+    texts = ["double espresso", "green tea", "paris france", "espresso machine", "lemon tea"]
+    query = embed_dense("espresso")
+    results = []
+    for use_numpy in (False, True):
+        if use_numpy and np is None:
+            continue
+        index = VectorIndex(256, use_numpy=use_numpy)
+        for i, t in enumerate(texts, start=1):
+            index.upsert(i, embed_dense(t))
+        index.remove(3)
+        assert len(index) == 4 and 3 not in index
+        results.append([fid for fid, _ in index.top_k(query, 2)])
+    assert all(r == [1, 4] or r == [4, 1] for r in results)
+    assert len({tuple(r) for r in results}) == 1
+
+
+def test_inverted_index_candidates_contain_exact_top_k(tmp_path) -> None:
+    from memory.indexing import InvertedIndex
+
+    words = ["espresso", "tea", "paris", "berlin", "river", "mountain", "coffee", "lemon", "sugar", "train"]
+    docs = {i: embed_text(f"{words[i % 10]} {words[(i * 3) % 10]} note {i}") for i in range(300)}
+    index = InvertedIndex()
+    for doc_id, vec in docs.items():
+        index.add_vector(doc_id, vec)
+
+    query = embed_text("espresso with sugar")
+    exact = sorted(docs, key=lambda d: cosine_similarity(query, docs[d]), reverse=True)[:5]
+    cands = index.candidates(query, 5)
+    assert set(exact) <= set(cands)
+    assert len(cands) < len(docs)
+
+    index.remove_vector(exact[0])
+    assert exact[0] not in index.candidates(query, 5)
+
+    # Re-adding appends a new slot instead of compacting every posting list each time
+    compactions: list[int] = []
+    real_compact = index._compact
+    index._compact = lambda: (compactions.append(1), real_compact())[1]  # type: ignore[method-assign]
+    docs = {doc_id: embed_text(f"train schedule {doc_id}") for doc_id in docs}
+    for doc_id, vec in docs.items():
+        index.add_vector(doc_id, vec)
+    assert compactions == [] and len(index) == len(docs)
+    assert not set(exact) & set(index.candidates(query, 5))  # stale postings are skipped
+    assert 7 in index.candidates(embed_text("train schedule 7"), 1)
+    index.save(tmp_path / "facts.terms")
+    live_postings = sum(1 for vec in docs.values() for w in vec.values() if w > 0)
+    assert compactions == [1] and sum(len(s) for s, _w in index._postings.values()) == live_postings
+    loaded = InvertedIndex.load(tmp_path / "facts.terms")
+    assert loaded is not None and loaded.candidates(query, 5) == index.candidates(query, 5)
+
+
+def test_lsh_approximate_lookup_matches_exact(monkeypatch) -> None:
+    from memory.lsh import benchmark
+
+    monkeypatch.setenv("NOVA_NONINTERACTIVE", "1")
+    monkeypatch.setenv("NOVA_PERMISSION_DEFAULT", "deny")
+    ltm = LTM()
+    ltm.add_facts_many((f"note:{i}", f"reminder number {i} about the weekly report") for i in range(100))
+    target = ltm.add_fact("note:coffee", "User likes double espresso with one sugar")
+    assert ltm.index_minhash() == 101
+    assert ltm.index_minhash() == 0  # already indexed
+
+    top = ltm.query_approx("user likes a double espresso with sugar", top_k=1)
+    assert top and top[0][0] == target and 0 < top[0][-1] <= 1
+
+    plan = " ".join(ltm.explain_query_plan("SELECT fact_id FROM lsh_buckets WHERE band = ? AND bucket = ?", (0, 1)))
+    assert "PRIMARY KEY" in plan or "COVERING INDEX" in plan
+
+    stats = benchmark(ltm, ["double espresso with one sugar"], top_k=1)
+    assert stats["recall"] == 1.0 and stats["approx_ms"] >= 0
+
+
+def test_search_text_ranks_with_bm25_and_tracks_writes(monkeypatch) -> None:
+    monkeypatch.setenv("NOVA_NONINTERACTIVE", "1")
+    monkeypatch.setenv("NOVA_PERMISSION_DEFAULT", "deny")
+    ltm = LTM()
+    ltm.add_fact("note:city", "Paris is the capital of France")
+    ltm.add_facts_many([("note:river", "The Seine flows through Paris and Paris only"), ("note:tea", "Green tea")])
+    ltm.log_event("chat", "user: tell me about Berlin | nova: Berlin is in Germany")
+
+    hits = ltm.search_text("paris", top_k=5)
+    assert {h[1] for h in hits} == {"note:city", "note:river"}
+    assert hits[0][1] == "note:river"  # more occurrences ranks higher
+    assert "[Paris]" in hits[0][3] and hits[0][4] > 0
+
+    events = ltm.search_text("berlin", kind="events")
+    assert events and events[0][1] == "chat"
+    assert ltm.search_text("zanzibar") == []
+    # Keys and event types aren't searched: "note" and "chat" only appear there
+    assert ltm.search_text("note") == [] and ltm.search_text("chat", kind="events") == []
+    plan = " ".join(ltm.explain_query_plan("SELECT rowid FROM facts_fts WHERE facts_fts MATCH ?", ("paris",)))
+    assert "VIRTUAL TABLE INDEX" in plan
+
+
+def test_citation_urls_resolved_in_one_query(monkeypatch) -> None:
+    monkeypatch.setenv("NOVA_NONINTERACTIVE", "1")
+    monkeypatch.setenv("NOVA_PERMISSION_DEFAULT", "deny")
+    ltm = LTM()
+    ltm.add_fact_with_sources("learned:a", "A", [("https://a.org/1", "one"), ("https://a.org/2", "two")])
+    ltm.add_fact_with_sources("learned:a", "A again", [("https://a.org/1", "one")])
+    ltm.add_fact_with_sources("learned:b", "B", [("https://b.org", "b"), ("", "empty")])
+    ltm.add_fact("learned:c", "C")
+
+    statements: list[str] = []
+    ltm._conn.set_trace_callback(statements.append)
+    assert ltm.get_citation_urls_for_key("learned:a") == ["https://a.org/1", "https://a.org/2"]
+    assert ltm.get_citation_urls_for_key("learned:a", limit=1) == ["https://a.org/1"]
+    batched = ltm.get_citation_urls_for_keys(["learned:a", "learned:b", "learned:c", "learned:a"])
+    assert batched == {"learned:a": ["https://a.org/1", "https://a.org/2"], "learned:b": ["https://b.org"], "learned:c": []}
+    assert len(statements) == 3
+
+
+def test_keyset_pagination_and_streaming_readers(monkeypatch) -> None:
+    from datetime import datetime, timedelta, timezone
+
+    monkeypatch.setenv("NOVA_NONINTERACTIVE", "1")
+    monkeypatch.setenv("NOVA_PERMISSION_DEFAULT", "deny")
+    ltm = LTM()
+    eids = ltm.log_events_many(("chat", f"turn {i}") for i in range(25))
+    ltm.log_event("job", "name=nightly status=ok")
+    ltm.add_facts_many((f"note:{i}", str(i)) for i in range(12))
+
+    page = ltm.get_events("chat", limit=10)
+    assert [r[0] for r in page] == list(reversed(eids))[:10]
+    nxt = ltm.get_events("chat", limit=10, before_id=page[-1][0])
+    assert nxt[0][0] == page[-1][0] - 1
+
+    streamed = list(ltm.iter_events("chat", batch_size=7))
+    assert [r[0] for r in streamed] == list(reversed(eids))
+    assert len(list(ltm.iter_facts(batch_size=5))) == 12
+
+    future = datetime.now(timezone.utc) + timedelta(days=1)
+    assert ltm.get_events(since=future) == []
+    assert len(ltm.get_events(since=datetime.now(timezone.utc) - timedelta(days=1))) == 26
+
+
+def test_event_retention_rolls_up_and_archives(monkeypatch, tmp_path) -> None:
+    from memory.retention import compact_events, event_rollups
+
+    ltm = _persistent_ltm(monkeypatch, tmp_path)
+    old = ltm.log_events_many([("chat", "old one"), ("job", "old job"), ("chat", "old two")])
+    ltm.log_event("chat", "fresh")
+    ltm._conn.execute("UPDATE events SET created_at = '2020-01-02 10:00:00' WHERE id <= ?", (old[-1],))
+    ltm._conn.commit()
+
+    res = compact_events(ltm, older_than_days=30, segment_size=2)
+    assert res == {"events": 3, "segments": 2, "rollups": 3}
+    assert [r[2] for r in ltm.get_events()] == ["fresh"]
+    assert sorted(event_rollups(ltm)) == [("2020-01-02", "chat", 2), ("2020-01-02", "job", 1)]
+    assert len(list((tmp_path / "archive").glob("*.jsonl.gz"))) == 2
+
+    chats = ltm.get_events("chat", include_archive=True)
+    assert [c for _i, _t, c, _ts in chats] == ["fresh", "old two", "old one"]
+    assert len(ltm.get_events(include_archive=True, limit=2)) == 2
+    # Nothing left to compact
+    assert compact_events(ltm, older_than_days=30)["events"] == 0
+
+    # Pages freed by compaction are returned to the OS, not left on the freelist
+    bulky = ltm.log_events_many(("bulk", "x" * 400) for _ in range(2000))
+    ltm._conn.execute("UPDATE events SET created_at = '2020-01-03 10:00:00' WHERE id >= ?", (bulky[0],))
+    ltm._conn.commit()
+    assert compact_events(ltm, older_than_days=30, archive=False)["events"] == 2000
+    assert ltm._conn.execute("PRAGMA freelist_count").fetchone()[0] < 10
+    ltm.close()
+
+
+def test_event_retention_converts_db_without_auto_vacuum(monkeypatch, tmp_path) -> None:
+    import sqlite3
+
+    from memory.retention import compact_events
+
+    # A memory.db from before auto_vacuum was set when creating the file
+    conn = sqlite3.connect(str(tmp_path / "memory.db"))
+    conn.execute("CREATE TABLE prefs (key TEXT PRIMARY KEY, value TEXT)")
+    conn.commit()
+    conn.close()
+    ltm = _persistent_ltm(monkeypatch, tmp_path)
+    assert ltm._conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 0
+    ids = ltm.log_events_many(("bulk", "x" * 400) for _ in range(3000))
+    ltm._conn.execute("UPDATE events SET created_at = '2020-01-03 10:00:00' WHERE id >= ?", (ids[0],))
+    ltm._conn.commit()
+    assert compact_events(ltm, older_than_days=30, archive=False)["events"] == 3000
+    assert ltm._conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2  # incremental from now on
+    assert ltm._conn.execute("PRAGMA freelist_count").fetchone()[0] < 10
+    ltm.close()
+
+
+def test_event_retention_keeps_rows_without_archive(monkeypatch) -> None:
+    from memory.retention import compact_events
+
+    monkeypatch.setenv("NOVA_NONINTERACTIVE", "1")
+    monkeypatch.setenv("NOVA_PERMISSION_DEFAULT", "deny")
+    ltm = LTM()
+    ltm.log_event("chat", "old")
+    ltm._conn.execute("UPDATE events SET created_at = '2020-01-02 10:00:00'")
+    assert compact_events(ltm, older_than_days=30)["events"] == 0
+    assert len(ltm.get_events()) == 1
+    # Explicitly dropping (rollup only) works without an archive
+    assert compact_events(ltm, older_than_days=30, archive=False)["events"] == 1
+    assert ltm.get_events() == []
+
+
+def test_lookup_cache_serves_repeats_and_invalidates_on_write(monkeypatch) -> None:
+    monkeypatch.setenv("NOVA_NONINTERACTIVE", "1")
+    monkeypatch.setenv("NOVA_PERMISSION_DEFAULT", "deny")
+    ltm = LTM()
+    ltm.add_fact_with_sources("capital:france", "Paris", [("https://en.wikipedia.org/wiki/Paris", "Paris")])
+    ltm.set_pref("theme", "dark")
+
+    def lookups() -> tuple:
+        return (
+            ltm.get_facts("capital:france", limit=1)[0][2],
+            ltm.get_citation_urls_for_key("capital:france"),
+            ltm.get_pref("theme"),
+        )
+
+    first = lookups()
+    statements: list[str] = []
+    ltm._conn.set_trace_callback(statements.append)
+    assert lookups() == first
+    assert statements == []  # answered without touching SQLite
+    assert ltm.cache_stats()["hits"] == 3
+
+    ltm.add_fact_with_sources("capital:france", "Paris, France", [("https://www.britannica.com/place/Paris", "B")])
+    ltm.set_pref("theme", "light")
+    fact, cites, theme = lookups()
+    assert fact == "Paris, France" and cites[0].startswith("https://www.britannica.com") and theme == "light"
+
+
+def test_lru_cache_bounds_and_ttl(monkeypatch) -> None:
+    from memory import cache as cache_mod
+
+    lru = cache_mod.LRUCache(max_entries=2, max_bytes=10_000, ttl_seconds=5)
+    lru.put("a", "x" * 10, tag="t")
+    lru.put("b", "y")
+    lru.get("a")
+    lru.put("c", "z")  # evicts least recently used "b"
+    assert lru.get("b") is None and lru.get("a") == "x" * 10
+    lru.invalidate_tag("t")
+    assert lru.get("a") is None
+    lru.put("big", "q" * 20_000)  # larger than max_bytes: not cached
+    assert len(lru) == 1
+
+    now = [1000.0]
+    monkeypatch.setattr(cache_mod.time, "monotonic", lambda: now[0])
+    lru.put("d", 1)
+    now[0] += 6
+    assert lru.get("d") is None
+
+
+def test_threadsafe_ltm_group_commits_concurrent_writes(monkeypatch, tmp_path) -> None:
+    import threading
+
+    ltm = _persistent_ltm(monkeypatch, tmp_path, memory_threadsafe=True)
+    errors: list[BaseException] = []
+
+    def worker(n: int) -> None:
+        try:
+            for i in range(25):
+                ltm.add_fact(f"t:{n}", f"value {i}")
+                assert ltm.get_facts(f"t:{n}", limit=1)[0][2] == f"value {i}"  # reads see own writes
+                ltm.log_event("thread", f"{n}:{i}")
+        except BaseException as exc:  # pragma: no cover - surfaced below
+            errors.append(exc)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    assert _count_facts_from_other_connection(tmp_path) == 200
+    assert ltm._writer is not None and ltm._writer.groups < 400  # writes were grouped
+
+    # A failing write is rolled back on its own and raised in the caller
+    with pytest.raises(ValueError):
+        ltm.upsert_fact_vector(1, [0.0])
+    ltm.add_fact("t:after", "still works")
+    assert ltm.get_facts("t:after", limit=1)[0][2] == "still works"
+
+    def batched() -> None:
+        with ltm.batch():
+            ltm.add_fact("t:batch", "one")
+            ltm.add_fact("t:batch", "two")
+
+    t = threading.Thread(target=batched)
+    t.start()
+    t.join()
+    assert [r[2] for r in ltm.get_facts("t:batch")] == ["two", "one"]
+    ltm.close()
+    assert _count_facts_from_other_connection(tmp_path) == 203
+
+
+def test_threadsafe_cache_is_invalidated_after_commit(monkeypatch, tmp_path) -> None:
+    import threading
+
+    ltm = _persistent_ltm(monkeypatch, tmp_path, memory_threadsafe=True)
+    seen: list = []
+    with ltm.batch():
+        ltm.add_fact("capital:x", "NewValue")
+        # Another thread reads (and caches) the pre-commit state while the batch is open
+        t = threading.Thread(target=lambda: seen.append(ltm.get_facts("capital:x", limit=1)))
+        t.start()
+        t.join()
+    assert seen == [[]]
+    assert ltm.get_facts("capital:x", limit=1)[0][2] == "NewValue"
+    ltm.close()
+
+
+def test_threadsafe_readers_of_finished_threads_are_closed(monkeypatch, tmp_path) -> None:
+    import sqlite3
+    import threading
+
+    ltm = _persistent_ltm(monkeypatch, tmp_path, memory_threadsafe=True)
+    ltm.add_fact("k", "v")
+    opened: list[sqlite3.Connection] = []
+
+    def read() -> None:
+        assert ltm.get_facts("k")
+        opened.append(ltm._reader())
+
+    for _ in range(30):  # like one scheduler Timer thread per job run
+        t = threading.Thread(target=read)
+        t.start()
+        t.join()
+    assert len(ltm._readers) == 1
+    with pytest.raises(sqlite3.ProgrammingError):
+        opened[0].execute("SELECT 1")
+    ltm.close()
+
+
+@pytest.mark.parametrize("persist", [False, True])
+def test_threadsafe_semantic_reads_do_not_deadlock_with_vector_writes(monkeypatch, tmp_path, persist) -> None:
+    import threading
+
+    from memory.indexing import embed_dense
+
+    # With a persistent embedding cache, the reader's new embeddings are writes too
+    ltm = _persistent_ltm(monkeypatch, tmp_path, memory_threadsafe=True, memory_embed_cache_persist=persist)
+    ids = [ltm.add_fact(f"doc:{i}", f"paris is in france {i}") for i in range(20)]
+    ltm.query_semantic("paris")  # resident index loaded, so upserts take _index_lock
+    vec = embed_dense("paris france", ltm._vector_dim)
+    stop = threading.Event()
+    errors: list[BaseException] = []
+
+    def upserter() -> None:
+        try:
+            while not stop.is_set():
+                for fid in ids:
+                    ltm.upsert_fact_vector(fid, vec)
+        except BaseException as exc:  # pragma: no cover - surfaced below
+            errors.append(exc)
+
+    def fresh_reader(n: int) -> None:
+        try:
+            ltm.add_fact(f"reader:{n}", f"paris reader {n} {persist}")
+            assert ltm.query_semantic("paris", top_k=1)
+        except BaseException as exc:  # pragma: no cover - surfaced below
+            errors.append(exc)
+
+    upserters = [threading.Thread(target=upserter, daemon=True) for _ in range(3)]
+    for t in upserters:
+        t.start()
+    for n in range(20):
+        # A new thread opens its reader connection inside query_semantic
+        t = threading.Thread(target=fresh_reader, args=(n,), daemon=True)
+        t.start()
+        t.join(timeout=10)
+        assert not t.is_alive(), "query_semantic deadlocked with the writer thread"
+    stop.set()
+    for t in upserters:
+        t.join(timeout=10)
+    assert errors == []
+    ltm.close()
+
+
+def test_async_ltm_awaits_calls_and_streams_events(monkeypatch, tmp_path) -> None:
+    import asyncio
+
+    from memory.async_store import AsyncLTM
+
+    monkeypatch.setenv("NOVA_NONINTERACTIVE", "1")
+    monkeypatch.setenv("NOVA_PERMISSION_DEFAULT", "allow")
+    monkeypatch.setenv("NOVA_DATA_DIR", str(tmp_path))
+
+    async def main() -> tuple:
+        async with AsyncLTM(max_workers=3) as mem:
+            ids = await asyncio.gather(*(mem.log_event("chat", f"m{i}") for i in range(30)))
+            fid = await mem.add_fact("capital:france", "Paris")
+            facts = await mem.get_facts("capital:france", limit=1)
+            streamed = [e[0] async for e in mem.iter_events("chat", batch_size=7)]
+            await mem.add_facts_many([(f"capital:c{i}", "x") for i in range(5)])
+            capitals = [r[1] async for r in mem.iter_facts_by_prefix("capital:", batch_size=2)]
+            return ids, fid, facts, streamed, capitals
+
+    ids, fid, facts, streamed, capitals = asyncio.run(main())
+    assert facts[0][0] == fid and facts[0][2] == "Paris"
+    assert capitals == [f"capital:c{i}" for i in range(5)] + ["capital:france"]
+    assert streamed == sorted(ids, reverse=True)
+
+
+def test_graph_traversal_multi_hop(monkeypatch) -> None:
+    monkeypatch.setenv("NOVA_NONINTERACTIVE", "1")
+    monkeypatch.setenv("NOVA_PERMISSION_DEFAULT", "deny")
+    ltm = LTM()
+    ltm.add_relations_many(
+        [
+            ("Paris", "capital_of", "France", None),
+            ("France", "member_of", "EU", None),
+            ("EU", "located_in", "Europe", None),
+            ("Europe", "contains", "France", None),  # cycle
+            ("Lyon", "city_in", "France", None),
+        ]
+    )
+    walk = ltm.traverse("Paris", max_depth=3)
+    assert [(n, d) for n, d, _ in walk] == [("France", 1), ("EU", 2), ("Europe", 3)]
+    assert walk[-1][2] == ["Paris", "France", "EU", "Europe"]
+    assert [n for n, _, _ in ltm.traverse("Paris", 5, preds=["capital_of", "member_of"])] == ["France", "EU"]
+
+    assert ltm.shortest_path("Paris", "Europe") == [
+        ("Paris", "capital_of", "France"),
+        ("France", "member_of", "EU"),
+        ("EU", "located_in", "Europe"),
+    ]
+    assert ltm.shortest_path("Paris", "Europe", max_depth=2) is None
+    assert ltm.shortest_path("Europe", "Lyon", direction="in") == [
+        ("EU", "located_in", "Europe"),
+        ("France", "member_of", "EU"),
+        ("Lyon", "city_in", "France"),
+    ]
+    assert ltm.reachable("France", max_depth=10) == {"EU", "Europe"}
+    assert ltm.reachable("France", 1, direction="in") == {"Paris", "Lyon", "Europe"}
+    plan = " ".join(ltm.explain_query_plan("SELECT subj FROM relations WHERE obj = ? AND pred = ?", ("France", "x")))
+    assert "idx_relations_obj_pred" in plan, plan
+
+
+def test_csr_graph_snapshot_refreshes_and_persists(monkeypatch, tmp_path) -> None:
+    from memory.graph import CSRGraph, load_graph, snapshot_path
+
+    ltm = _persistent_ltm(monkeypatch, tmp_path)
+    ltm.add_relations_many([("a", "knows", "b"), ("b", "knows", "c"), ("c", "knows", "a"), ("x", "likes", "y")])
+    graph = load_graph(ltm)
+    assert graph.num_edges == 4 and snapshot_path(ltm).exists()
+    assert graph.bfs("a") == {"a": 0, "b": 1, "c": 2}
+    assert list(graph.out_edges("x")) == [("likes", "y")]
+
+    ltm.add_relations_many([("c", "knows", "d"), ("a", "knows", "d")])
+    graph = load_graph(ltm)  # starts from relations.csr, reads only the two new edges
+    assert graph.num_edges == 6 and graph.bfs("a", max_depth=1) == {"a": 0, "b": 1, "d": 1}
+    assert [sorted(c) for c in graph.connected_components()] == [["a", "b", "c", "d"], ["x", "y"]]
+    ranks = graph.pagerank()
+    assert abs(sum(ranks.values()) - 1.0) < 1e-6 and max(ranks, key=ranks.get) == "d"
+
+    reloaded = CSRGraph.load(snapshot_path(ltm))
+    assert reloaded is not None and reloaded.watermark == graph.watermark
+    assert list(reloaded.offsets) == list(graph.offsets) and list(reloaded.targets) == list(graph.targets)
+
+
+def test_facts_and_sources_are_deduplicated(monkeypatch, tmp_path) -> None:
+    import sqlite3
+
+    ltm = _persistent_ltm(monkeypatch, tmp_path)
+    srcs = [("https://a.example/paris", "A"), ("https://b.example/paris", "B")]
+    first = ltm.add_fact_with_sources("capital:france", "Paris", srcs)
+    again = ltm.add_fact_with_sources("capital:france", "Paris", srcs[::-1] + [("https://c.example", "C")])
+    assert again == first
+    assert ltm.add_facts_many([("capital:france", "Paris"), ("capital:spain", "Madrid")]) == range(first + 1, first + 2)
+    assert sorted(ltm.get_citation_urls_for_key("capital:france")) == [
+        "https://a.example/paris",
+        "https://b.example/paris",
+        "https://c.example",
+    ]
+    assert ltm.add_source("https://a.example/paris", "A again") == ltm.add_source("https://a.example/paris", "")
+
+    # A -> B -> A: the re-learned value is served newest-first again, keeping its citations
+    sucre = ltm.add_fact("capital:bolivia", "Sucre", source_id=ltm.add_source("https://s.example", "S"))
+    ltm.upsert_fact_vector(sucre, embed_text("Sucre"))
+    la_paz = ltm.add_fact("capital:bolivia", "La Paz")
+    assert ltm.get_facts("capital:bolivia", limit=1)[0][2] == "La Paz"
+    again = ltm.add_fact("capital:bolivia", "Sucre")
+    assert again > la_paz
+    assert [r[2] for r in ltm.get_facts("capital:bolivia")] == ["Sucre", "La Paz"]
+    assert ltm.get_citation_urls_for_key("capital:bolivia") == ["https://s.example"]
+    assert ltm.get_fact_vector(sucre) is None and ltm.get_fact_vector(again) is not None
+    assert ltm.add_fact("capital:bolivia", "Sucre") == again  # already newest: id kept
+    ltm.close()
+
+    # A v6 database with duplicate rows is merged on upgrade
+    conn = sqlite3.connect(str(tmp_path / "memory.db"))
+    conn.execute("DROP INDEX idx_facts_content_hash")
+    conn.execute("DROP INDEX idx_sources_url_hash")
+    conn.execute("DROP TABLE fact_sources")
+    conn.execute("UPDATE facts SET content_hash = NULL")
+    conn.execute("UPDATE sources SET url_hash = NULL")
+    conn.execute("INSERT INTO sources(id, url, title) VALUES (100, 'https://a.example/paris', 'dup')")
+    conn.execute("INSERT INTO facts(id, key, value, source_id) VALUES (100, 'capital:france', 'Paris', 100)")
+    conn.execute("INSERT INTO fact_vectors(fact_id, dim, vector) VALUES (?, 1, x'00000000')", (first,))
+    conn.execute("INSERT INTO relations(subj, pred, obj, source_id) VALUES ('Paris', 'capital_of', 'France', 100)")
+    conn.execute("PRAGMA user_version = 6")
+    conn.commit()
+    conn.close()
+
+    ltm = _persistent_ltm(monkeypatch, tmp_path)
+    rows = ltm.get_facts("capital:france")
+    assert [(r[0], r[2]) for r in rows] == [(100, "Paris")]  # newest duplicate survives
+    assert ltm.get_fact_vector(first) is None
+    assert ltm.get_relations(subj="Paris")[0][4] == ltm.add_source("https://a.example/paris", "")
+    assert "https://a.example/paris" in ltm.get_citation_urls_for_key("capital:france")
+    assert ltm._conn.execute("SELECT COUNT(*) FROM sources WHERE url = 'https://a.example/paris'").fetchone()[0] == 1
+
+
+def test_online_backup_compressed_and_checksummed(monkeypatch, tmp_path) -> None:
+    import gzip
+    import hashlib
+    import sqlite3
+
+    ltm = _persistent_ltm(monkeypatch, tmp_path, memory_backup_nightly=True, memory_backup_keep=1)
+    ltm.add_facts_many((f"k{i}", f"v{i}") for i in range(500))
+    steps: list[int] = []
+    plain = ltm.backup(tmp_path / "out" / "copy.db", pages_per_step=2, progress=lambda st, rem, tot: steps.append(rem))
+    assert plain is not None and len(steps) > 1
+    copy = sqlite3.connect(str(plain))
+    assert copy.execute("SELECT COUNT(*) FROM facts").fetchone()[0] == 500
+    assert copy.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+    copy.close()
+
+    packed = ltm.backup(tmp_path / "out" / "copy2.db", compress=True)
+    assert packed is not None and packed.name == "copy2.db.gz"
+    expected = (tmp_path / "out" / "copy2.db.gz.sha256").read_text().split()[0]
+    assert hashlib.sha256(packed.read_bytes()).hexdigest() == expected
+    assert gzip.decompress(packed.read_bytes())[:16] == b"SQLite format 3\x00"
+
+    from nova import jobs
+
+    (tmp_path / "backups").mkdir()
+    (tmp_path / "backups" / "memory-20000101-000000.db.gz").write_bytes(b"old")
+    name = jobs._nightly_backup(ltm)
+    assert name.startswith("memory-") and [p.name for p in (tmp_path / "backups").glob("*.db.gz")] == [name]
+
+
+def test_embedding_cache_and_persisted_embeddings(monkeypatch, tmp_path) -> None:
+    from memory import indexing
+
+    calls: list[str] = []
+    real = indexing._embed
+    monkeypatch.setattr(indexing, "_embed", lambda text: calls.append(text) or real(text))
+    indexing.configure_embedding_cache(0, 0)
+    indexing.configure_embedding_cache(64, 1 << 20)
+
+    first = indexing.embed_text("Paris is the capital of France")
+    first["mutated"] = 1.0  # callers get their own copy
+    assert "mutated" not in indexing.embed_text("Paris is the capital of France")
+    many = indexing.embed_many(["a b c", "Paris is the capital of France", "a b c"])
+    assert many[0] == many[2] and many[0] is not many[2]
+    assert calls == ["Paris is the capital of France", "a b c"]
+
+    ltm = _persistent_ltm(monkeypatch, tmp_path, memory_embed_cache_persist=True)
+    ltm.embed_many(["stored across restarts"])
+    ltm.close()
+    indexing.configure_embedding_cache(0, 0)  # forget everything in-process
+    indexing.configure_embedding_cache(64, 1 << 20)
+    calls.clear()
+    ltm = _persistent_ltm(monkeypatch, tmp_path, memory_embed_cache_persist=True)
+    assert ltm.embed_many(["stored across restarts"]) == [real("stored across restarts")]
+    assert calls == []
+
+
+def test_consolidate_processes_only_new_facts(monkeypatch) -> None:
+    from memory.consolidator import WATERMARK_PREF
+
+    monkeypatch.setenv("NOVA_NONINTERACTIVE", "1")
+    monkeypatch.setenv("NOVA_PERMISSION_DEFAULT", "deny")
+    ltm = LTM()
+    ltm.add_facts_many([("capital:france", "Paris"), ("note:a", "alpha")])
+    assert consolidate(ltm) == 2
+    assert ltm.get_pref(WATERMARK_PREF) == str(ltm.get_facts(limit=1)[0][0])
+    assert consolidate(ltm) == 0
+
+    fid = ltm.add_fact("capital:spain", "Madrid")
+    assert consolidate(ltm) == 1
+    assert ltm.get_fact_vector(fid) is not None
+    assert ("capital_of", "Madrid") in ltm.neighbors("Spain")
+    assert consolidate(ltm, full=True) == 3
+    assert ltm._conn.execute("SELECT COUNT(*) FROM fact_minhash").fetchone()[0] == 0  # LSH index is opt-in
+
+    ltm.settings.memory_lsh_index = True
+    assert consolidate(ltm) == 3  # enabling it signs every fact once
+    assert consolidate(ltm) == 0
+    coffee = ltm.add_fact("note:coffee", "User likes double espresso")
+    assert consolidate(ltm) == 1
+    assert ltm.query_approx("likes a double espresso", top_k=1)[0][0] == coffee
+
+
+def test_pipeline_process_pool_matches_inline(monkeypatch) -> None:
+    from memory.pipeline import run_pipeline
+
+    monkeypatch.setenv("NOVA_NONINTERACTIVE", "1")
+    monkeypatch.setenv("NOVA_PERMISSION_DEFAULT", "deny")
+    ltm = LTM()
+    ids = ltm.add_facts_many([(f"capital:c{i}", f"city {i}") for i in range(9)] + [("note:x", "plain")])
+    assert run_pipeline(ltm, 0, ids[-1], workers=2, chunk_size=2, max_in_flight=2, minhash=ltm._minhasher) == 10
+    pooled = {fid: list(ltm.get_fact_vector(fid)) for fid in ids}
+    assert ("capital_of", "City 3") in ltm.neighbors("C3")
+    sig = ltm._conn.execute("SELECT signature FROM fact_minhash WHERE fact_id = ?", (ids[3],)).fetchone()[0]
+    assert sig == ltm._minhasher.signature("city 3").tobytes()  # signed in the worker processes
+
+    ltm._conn.execute("DELETE FROM fact_vectors")
+    assert run_pipeline(ltm, 0, ids[-1], workers=1) == 10
+    assert {fid: list(ltm.get_fact_vector(fid)) for fid in ids} == pooled
+
+    # The single writer commits page by page rather than holding one transaction for the pass
+    depths: list[int] = []
+    real_batch = LTM.batch
+    monkeypatch.setattr(LTM, "batch", lambda self: (depths.append(self._batch_depth), real_batch(self))[1])
+    assert run_pipeline(ltm, 0, ids[-1], workers=1, chunk_size=2) == 10
+    assert depths.count(0) == 5  # one outermost transaction per page
+
+
+def test_relation_rule_engine(monkeypatch) -> None:
+    from memory import rules
+
+    engine = rules.RuleEngine(
+        rules.RULES
+        + [
+            rules.RelationRule(
+                name="born",
+                prefix="person:",
+                pattern=r"born in (?P<place>[A-Za-z ]+?)(?:[.,]|$)",
+                triples=(("{rest}", "born_in", "{place}"),),
+            ),
+            rules.RelationRule(name="cap_short", prefix="capital:f", triples=(("{rest}", "starts_with", "F"),)),
+            rules.RelationRule(
+                name="located",
+                pattern=r"(?P<a>[A-Z]\w+) is in (?P<b>[A-Z]\w+)",
+                triples=(("{a}", "located_in", "{b}"),),
+                title=False,
+            ),
+        ]
+    )
+    assert engine.extract("capital:france", "paris") == [
+        ("France", "capital_of", "Paris"),
+        ("Paris", "is_capital_of", "France"),
+        ("Rance", "starts_with", "F"),
+    ]
+    assert engine.extract("person:ada lovelace", "Ada was born in London, England") == [
+        ("Ada Lovelace", "born_in", "London")
+    ]
+    assert engine.extract("note:x", "Lyon is in France and Turin is in Italy") == [
+        ("Lyon", "located_in", "France"),
+        ("Turin", "located_in", "Italy"),
+    ]
+    with pytest.raises(ValueError):
+        rules.RelationRule(name="bad", prefix="x:", triples=(("{nope}", "p", "o"),))
+
+    # Inline flags and numbered backreferences can't be pasted into the shared alternation as-is
+    engine = rules.RuleEngine(
+        [
+            rules.RelationRule(
+                name="likes", pattern=r"(?i)(?P<who>\w+) likes (?P<what>\w+)", triples=(("{who}", "likes", "{what}"),)
+            ),
+            rules.RelationRule(
+                name="twice", pattern=r"(\w+) and \1 (?P<verb>\w+)", triples=(("{value}", "repeats", "{verb}"),)
+            ),
+        ]
+    )
+    assert engine.extract("note:x", "ADA LIKES tea") == [("Ada", "likes", "Tea")]
+    assert engine.extract("note:x", "bob and bob agree") == [("Bob And Bob Agree", "repeats", "Agree")]
+    assert engine.extract("note:x", "bob and sue agree") == []
+
+    # Overlapping value rules all fire; registering one doesn't shadow another
+    engine = rules.RuleEngine(
+        [
+            rules.RelationRule(name="born", pattern=r"born in (?P<c>\w+)", triples=(("{c}", "birthplace_of", "?"),)),
+            rules.RelationRule(
+                name="born_who",
+                pattern=r"(?P<who>\w+) was born in (?P<place>\w+)",
+                triples=(("{who}", "born_in", "{place}"),),
+            ),
+        ]
+    )
+    assert engine.extract("note:x", "Einstein was born in Ulm") == [
+        ("Ulm", "birthplace_of", "?"),
+        ("Einstein", "born_in", "Ulm"),
+    ]
+
+    monkeypatch.setenv("NOVA_NONINTERACTIVE", "1")
+    monkeypatch.setenv("NOVA_PERMISSION_DEFAULT", "deny")
+    monkeypatch.setattr(rules, "RULES", list(rules.RULES))
+    monkeypatch.setattr(rules, "_ENGINE", None)
+    # register() compiles the engine right away, so a rule that breaks it fails here
+    rules.register(rules.RelationRule(name="yes", pattern=r"(?i)yes", triples=(("{key}", "agrees", "yes"),)))
+    assert rules._ENGINE is not None and rules.engine().extract("q", "YES") == [("Q", "agrees", "yes")]
+    rules.register(rules.RelationRule(name="lang", prefix="language:", triples=(("{rest}", "speaks", "{value}"),)))
+    ltm = LTM()
+    ltm.add_fact("language:brazil", "portuguese")
+    consolidate(ltm)
+    assert ltm.neighbors("Brazil") == [("speaks", "Portuguese")]
+
+
+def test_stats_table_tracks_inserts_and_deletes(monkeypatch, tmp_path) -> None:
+    from memory.store import stats_from_file
+
+    ltm = _persistent_ltm(monkeypatch, tmp_path)
+    ltm.add_facts_many([("capital:france", "Paris"), ("capital:spain", "Madrid"), ("misc", "x")])
+    ids = ltm.log_events_many([("chat", "a"), ("chat", "b"), ("inbox", "c")])
+    stats = ltm.stats()
+    assert stats["facts"] == 3 and stats["events"] == 3
+    assert stats["fact_namespaces"] == {"capital": 2, "misc": 1}
+    assert stats["event_types"] == {"chat": 2, "inbox": 1}
+    assert sum(stats["events_per_day"].values()) == 3
+
+    with ltm.batch():
+        ltm._conn.execute("DELETE FROM events WHERE id = ?", (ids[0],))
+    assert ltm.stats()["event_types"] == {"chat": 1, "inbox": 1}
+    ltm.close()
+    assert stats_from_file(tmp_path / "memory.db")["events"] == 2
+    assert stats_from_file(tmp_path / "missing.db") is None
+
+
+def test_get_facts_by_prefix_uses_key_range(monkeypatch) -> None:
+    monkeypatch.setenv("NOVA_NONINTERACTIVE", "1")
+    monkeypatch.setenv("NOVA_PERMISSION_DEFAULT", "deny")
+    ltm = LTM()
+    ids = ltm.add_facts_many(
+        [("learned:a", "1"), ("learnedx", "2"), ("learned:b", "3"), ("learned;", "4"), ("capital:x", "5"), ("learned:c", "6")]
+    )
+    b2 = ltm.add_fact("learned:b", "7")
+    page = ltm.get_facts_by_prefix("learned:", limit=2)
+    assert [(r[1], r[2]) for r in page] == [("learned:a", "1"), ("learned:b", "7")]
+    after = (page[-1][1], page[-1][0])
+    assert [r[2] for r in ltm.get_facts_by_prefix("learned:", 5, after=after)] == ["3", "6"]
+    streamed = [r[0] for r in ltm.iter_facts_by_prefix("learned:", batch_size=1)]
+    assert streamed == [ids[0], b2, ids[2], ids[5]]
+    assert ltm.count_facts_by_prefix("learned:") == 4
+    assert ltm.namespace_counts() == {"learned": 4, "learnedx": 1, "learned;": 1, "capital": 1}
+
+    # Every page is an index range scan in index order: no re-sort of the namespace per page
+    sqls: list[str] = []
+    ltm._conn.set_trace_callback(sqls.append)
+    ltm.get_facts_by_prefix("learned:", 2)
+    ltm.get_facts_by_prefix("learned:", 2, after=after)
+    ltm._conn.set_trace_callback(None)
+    for sql in sqls:
+        plan = " ".join(ltm.explain_query_plan(sql))
+        assert "idx_facts_key (key>? AND key<?)" in plan and "TEMP B-TREE" not in plan, plan
+    plan = " ".join(ltm.explain_query_plan("SELECT COUNT(*) FROM facts WHERE key >= ? AND key < ?", ("a", "b")))
+    assert "idx_facts_key" in plan, plan
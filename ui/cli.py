@@ -17,6 +17,7 @@ from security import policies
 
 app = typer.Typer(add_completion=False, help="Nova CLI — local deterministic assistant")
 jobs_app = typer.Typer(help="Background jobs: learning and consolidation")
+memory_app = typer.Typer(help="Memory maintenance: retention and storage")
 
 
 @app.callback()
@@ -105,10 +106,12 @@ def jobs_research(max_items: int = typer.Option(3, help="Max gaps to research"))
 
 
 @jobs_app.command("nightly")
-def jobs_nightly() -> None:
+def jobs_nightly(
+    full: bool = typer.Option(False, help="Reprocess every fact instead of only those added since the last run"),
+) -> None:
     """Run nightly consolidation job."""
     ltm = LTM()
-    run_nightly(ltm)
+    run_nightly(ltm, full=full)
     print("Nightly consolidation complete.")
 
 
@@ -124,7 +127,7 @@ def jobs_daily_summary() -> None:
 def jobs_status() -> None:
     """Show last job runs (nightly, research, daily-summary)."""
     ltm = LTM()
-    rows = ltm.get_events("job")[:20]
+    rows = ltm.get_events("job", limit=20)
     if not rows:
         print("No job runs yet.")
         return
@@ -206,6 +209,43 @@ def jobs_unschedule(
     print(f"[ok] Deleted task '{task_name}'")
 
 
+@memory_app.command("compact")
+def memory_compact(
+    days: int = typer.Option(None, help="Archive events older than N days (default: NOVA_MEMORY_EVENT_RETENTION_DAYS)"),
+    vacuum: bool = typer.Option(
+        False, help="Also run a full VACUUM (older DBs are converted to incremental vacuum automatically)"
+    ),
+) -> None:
+    """Roll up old events into daily counts and move them to the compressed archive."""
+    from memory.retention import compact_events
+    ltm = LTM()
+    res = compact_events(ltm, older_than_days=days, full_vacuum=vacuum)
+    ltm.close()
+    print(f"Archived {res['events']} event(s) in {res['segments']} segment(s).")
+
+
+@memory_app.command("backup")
+def memory_backup(
+    dest: Path = typer.Argument(None, help="Backup file (default: <data dir>/backups/memory-<timestamp>.db)"),
+    compress: bool = typer.Option(False, help="gzip the backup"),
+    checksum: bool = typer.Option(True, help="Write a .sha256 file next to the backup"),
+    pages: int = typer.Option(256, help="Pages copied per step; smaller steps yield to writers more often"),
+) -> None:
+    """Back up memory.db while Nova keeps running."""
+    ltm = LTM()
+    try:
+        path = ltm.backup(dest, pages_per_step=pages, compress=compress, checksum=checksum)
+    finally:
+        ltm.close()
+    if path is None:
+        print(Fore.YELLOW + "Backup not written (permission denied)." + Style.RESET_ALL)
+        raise typer.Exit(code=1)
+    print(f"Backup written to {path}")
+
+
+app.add_typer(memory_app, name="memory")
+
+
 @app.command("diag")
 def diag(
     json: bool = typer.Option(False, "--json", help="Output diagnostics as JSON"),
@@ -280,6 +320,20 @@ def diag(
         info["http"] = {}
         info["scheduler"] = {}
 
+    # Memory counts straight from the stats table (read-only; no permission prompt)
+    from memory.store import stats_from_file
+    mem_stats = stats_from_file(settings.data_dir / "memory.db")
+    info["memory"] = (
+        {
+            "facts": mem_stats["facts"],
+            "events": mem_stats["events"],
+            "event_types": mem_stats["event_types"],
+            "fact_namespaces": mem_stats["fact_namespaces"],
+        }
+        if mem_stats is not None
+        else {}
+    )
+
     if json:
         import json as _json
         keys: list[str] = []
@@ -327,6 +381,9 @@ def diag(
     sched = info.get("scheduler", {}) or {}
     if isinstance(sched, dict) and sched:
         print(f"Scheduled jobs: {sched.get('scheduled_jobs', 0)}")
+    mem = info.get("memory", {}) or {}
+    if isinstance(mem, dict) and mem:
+        print(f"Memory: facts={mem.get('facts', 0)} events={mem.get('events', 0)}")
 
 
 @app.command("config")
@@ -349,7 +406,7 @@ def show_config() -> None:
 def recent_chats(limit: int = typer.Option(5, help="How many recent chats to show")) -> None:
     """Show recent chat events from memory (best-effort)."""
     ltm = LTM()
-    rows = ltm.get_events("chat")[:limit]
+    rows = ltm.get_events("chat", limit=limit)
     if not rows:
         print("No recent chats.")
         return